@@ -0,0 +1,200 @@
+#   Copyright (c) 2024 Wildan R Wijanarko (@wildan9)
+#
+#   Permission is hereby granted, free of charge, to any person obtaining a copy
+#   of this software and associated documentation files (the "Software"), to deal
+#   in the Software without restriction, including without limitation the rights
+#   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#   copies of the Software, and to permit persons to whom the Software is
+#   furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in all
+#   copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#   SOFTWARE.
+
+# Headless micro-benchmarks for the math and tessellation core, no window is opened.
+#
+#   python bench.py --output bench.json
+#   python bench.py --baseline bench.json --threshold 0.10
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+
+import numpy as np
+from raylibpy import LIME, Vector2, check_collision_point_circle
+
+from geometry import (
+    CubicBezier, CubicBezier3D, Quat, SpatialGrid, TransformGraph, Vec2, Vec3,
+    bezier_coeffs, bezier_points, forward_difference, vec2_array,
+)
+from main import BezierObject, Point, Transform3D
+
+# ----------------------------------------------------------------
+# Cases
+
+def _curve_points():
+    return [Vec2(100, 200), Vec2(80, 100), Vec2(320, 100), Vec2(300, 200)]
+
+def _make_cases():
+    cases = {}
+    a, b = Vec2(1.0, 2.0), Vec2(3.0, 4.0)
+    out = Vec2()
+
+    cases["vec2_add"]        = lambda: a + b
+    cases["vec2_lerp"]       = lambda: a.lerp(b, 0.5)
+    cases["vec2_lerp_into"]  = lambda: a.lerp_into(b, 0.5, out)
+    cases["vec2_distance"]   = lambda: a.distance_to(b)
+
+    bezier_object = BezierObject()
+    p0, p1, p2, p3 = _curve_points()
+    ctrl = vec2_array((p0, p1, p2, p3))
+    ts = np.linspace(0.0, 1.0, 1001)
+    many_ctrl = np.repeat(ctrl[np.newaxis], 1000, axis=0)
+
+    cases["bezier_point"]             = lambda: bezier_object._bezier(p0, p1, p2, p3, 0.5)
+    cases["bezier_batch_1k"]          = lambda: bezier_points(ctrl, ts)
+    cases["bezier_batch_1k_curves"]   = lambda: bezier_points(many_ctrl, ts[::10])
+
+    # What _draw_bezier pays per frame with and without the curve cache
+    curve = CubicBezier(p0, p1, p2, p3)
+    def _tessellate_cold():
+        curve.mark_dirty()
+        return curve.flatten(0.25)
+
+    cases["tessellate_forward_diff"]  = lambda: forward_difference(bezier_coeffs(ctrl), 100)
+    cases["tessellate_flatten_cold"]  = _tessellate_cold
+    cases["tessellate_flatten_warm"]  = lambda: curve.flatten(0.25)
+    cases["arc_length_query"]         = lambda: curve.arc_length_table().t_at_distance(100.0)
+
+    queries = np.random.default_rng(1).uniform(0.0, 400.0, (1000, 2))
+    cases["project_1k"]               = lambda: curve.project(queries)
+
+    crossing = CubicBezier(Vec2(100, 120), Vec2(200, 220), Vec2(200, 80), Vec2(320, 180))
+    cases["intersect_cubics"]         = lambda: curve.intersect(crossing)
+
+    curve_3d = CubicBezier3D(Vec3(-3, 0.5, 0), Vec3(-1, 4, 3), Vec3(1, -1, -3), Vec3(3, 3, 0))
+    def _tube_cold():
+        curve_3d.mark_dirty()
+        return curve_3d.tube(0.15, 96, 16)
+
+    cases["tube_mesh_cold"]           = _tube_cold
+    cases["tube_mesh_warm"]           = lambda: curve_3d.tube(0.15, 96, 16)
+
+    transform = Transform3D(Vec3(1, 2, 3), Quat(), Vec3(1, 1, 1))
+    cases["transform3d_to_matrix"]    = transform.to_matrix
+
+    # A 1000 node hierarchy (ten chains of 100) with every node moved, then with only the bottom half of one chain moved
+    graph = TransformGraph()
+    for chain in range(10):
+        parent = -1
+        for _ in range(100):
+            parent = graph.add(parent, (1.0, 0.0, 0.0))
+    def _graph_update(nodes):
+        graph.mark_dirty(nodes)
+        graph.update()
+
+    cases["transform_graph_1k"]       = lambda: _graph_update(None)
+    cases["transform_graph_subtree"]  = lambda: _graph_update(950)
+
+    # Mirrors the hit-test loop in BezierObject.update over 1000 points
+    rng = np.random.default_rng(0)
+    points = [Point(Vec2(x, y), 20, LIME, "P") for x, y in rng.uniform(-1000, 1000, (1000, 2)).tolist()]
+    mouse = Vector2(0, 0)
+    rl_point = Vector2(0, 0)
+    def _hit_test():
+        hit = None
+        for point in points:
+            if check_collision_point_circle(mouse, point.pos.rl_vec(rl_point), point.size):
+                hit = point
+        return hit
+
+    cases["point_hit_test_1k"] = _hit_test
+
+    grid = SpatialGrid(64.0)
+    for i, point in enumerate(points):
+        grid.insert(i, point.pos.x, point.pos.y)
+    cases["point_hit_test_1k_grid"] = lambda: grid.nearest(0.0, 0.0, 20.0)
+
+    return cases
+
+# ----------------------------------------------------------------
+# Runner
+
+def run(cases, repeat, name_filter=None):
+    results = {}
+    for name, func in cases.items():
+        if name_filter and name_filter not in name:
+            continue
+
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+
+        results[name] = {
+            "min_us":  min(times) * 1e6,
+            "mean_us": sum(times) / len(times) * 1e6,
+            "number":  number,
+            "repeat":  repeat,
+        }
+        print(f"{name:<28} {results[name]['min_us']:>12.3f} us")
+
+    return results
+
+def compare(results, baseline, threshold):
+    # Compares the best-of-repeat times, a case regresses when it is slower than baseline * (1 + threshold)
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        ratio = result["min_us"] / baseline[name]["min_us"]
+        status = "REGRESSION" if ratio > 1.0 + threshold else "ok"
+        print(f"{name:<28} {baseline[name]['min_us']:>12.3f} -> {result['min_us']:>12.3f} us  x{ratio:.2f}  {status}")
+
+        if status != "ok":
+            regressions.append(name)
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless micro-benchmarks for the Bezier math core")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a JSON file written by --output")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before flagging a regression")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="only run cases whose name contains this string")
+    args = parser.parse_args()
+
+    results = run(_make_cases(), args.repeat, args.filter)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "python":   platform.python_version(),
+                "machine":  platform.machine(),
+                "numpy":    np.__version__,
+                "results":  results,
+            }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("Regressions: " + ", ".join(regressions))
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
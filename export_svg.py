@@ -0,0 +1,153 @@
+#   Copyright (c) 2024 Wildan R Wijanarko (@wildan9)
+#
+#   Permission is hereby granted, free of charge, to any person obtaining a copy
+#   of this software and associated documentation files (the "Software"), to deal
+#   in the Software without restriction, including without limitation the rights
+#   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#   copies of the Software, and to permit persons to whom the Software is
+#   furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in all
+#   copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#   SOFTWARE.
+
+# Headless batch export of curve files to SVG, spread over a process pool.
+#
+#   python export_svg.py curves/ more.json -o svg/ --jobs 8
+#
+# Inputs are scene files (see scene.py), binary or JSON. Degree 1, 2 and 3 curves become native
+# SVG L, Q and C segments, higher degrees are written as sampled polylines.
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
+import sys
+
+import numpy as np
+
+from geometry import BezierCurve, cubic_bounds
+from scene import BINARY_EXTENSION, load_scene
+
+HIGH_DEGREE_SAMPLES = 64
+
+# ----------------------------------------------------------------
+# SVG
+
+def _num(value):
+    return "{:.3f}".format(value).rstrip("0").rstrip(".")
+
+def _pairs(points):
+    return " ".join(_num(x) + "," + _num(y) for x, y in points.tolist())
+
+def curve_path(points):
+    degree = len(points) - 1
+    command = {1: "L", 2: "Q", 3: "C"}.get(degree)
+    if command is None:
+        return "M" + _pairs(points[:1]) + " L" + _pairs(BezierCurve(points).sample(HIGH_DEGREE_SAMPLES)[1:])
+    return "M" + _pairs(points[:1]) + " " + command + _pairs(points[1:])
+
+def curves_bounds(curves):
+    # Exact bounds for cubics, the control polygon box (which contains the curve) otherwise
+    boxes = []
+    for points in curves:
+        if len(points) == 4:
+            boxes.append(cubic_bounds(points))
+        else:
+            boxes.append(np.concatenate((points.min(axis=0), points.max(axis=0))))
+
+    boxes = np.array(boxes)
+    return np.concatenate((boxes[:, :2].min(axis=0), boxes[:, 2:].max(axis=0)))
+
+def to_svg(curves, stroke_width=2.0, margin=10.0, stroke="black"):
+    if curves:
+        min_x, min_y, max_x, max_y = curves_bounds(curves)
+    else:
+        min_x = min_y = max_x = max_y = 0.0
+
+    x, y = min_x - margin, min_y - margin
+    width, height = max_x - min_x + 2.0 * margin, max_y - min_y + 2.0 * margin
+
+    lines = ['<svg xmlns="http://www.w3.org/2000/svg" viewBox="{} {} {} {}" width="{}" height="{}">'.format(
+        _num(x), _num(y), _num(width), _num(height), _num(width), _num(height))]
+    lines.append('<g fill="none" stroke="{}" stroke-width="{}" stroke-linecap="round">'.format(stroke, _num(stroke_width)))
+    for points in curves:
+        lines.append('<path d="{}"/>'.format(curve_path(points)))
+    lines.append("</g>")
+    lines.append("</svg>")
+
+    return "\n".join(lines) + "\n"
+
+# ----------------------------------------------------------------
+# Batch
+
+def export_file(task):
+    # Runs in a worker process, returns (input path, output path or None, error or None)
+    path, output_path, stroke_width, margin = task
+    try:
+        svg = to_svg(list(load_scene(path)), stroke_width, margin)
+        with open(output_path, "w") as f:
+            f.write(svg)
+        return path, output_path, None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        return path, None, str(e)
+
+def output_path_for(path, output_dir):
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + ".svg")
+
+def collect_inputs(paths):
+    inputs = []
+    for path in paths:
+        if os.path.isdir(path):
+            inputs.extend(sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith((".json", BINARY_EXTENSION))))
+        else:
+            inputs.append(path)
+    return inputs
+
+def main():
+    parser = argparse.ArgumentParser(description="Export curve files to SVG without opening a window")
+    parser.add_argument("inputs", nargs="+", help="scene files or directories of scene files")
+    parser.add_argument("-o", "--output-dir", default=".")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--stroke-width", type=float, default=2.0)
+    parser.add_argument("--margin", type=float, default=10.0)
+    args = parser.parse_args()
+
+    # Inputs that would write the same file (a.json and a.bzs, or x.json in two directories) are
+    # refused up front, otherwise two workers could write one file and both report success
+    outputs = {}
+    for path in collect_inputs(args.inputs):
+        outputs.setdefault(os.path.normpath(output_path_for(path, args.output_dir)), []).append(path)
+
+    clashes = {output: paths for output, paths in outputs.items() if len(paths) > 1}
+    if clashes:
+        for output, paths in sorted(clashes.items()):
+            print(", ".join(paths) + " all write " + output, file=sys.stderr)
+        print("{} output name clashes, nothing exported".format(len(clashes)), file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    tasks = [(paths[0], output, args.stroke_width, args.margin) for output, paths in outputs.items()]
+
+    failed = 0
+    chunksize = max(1, len(tasks) // (args.jobs * 4))
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        for path, output_path, error in pool.map(export_file, tasks, chunksize=chunksize):
+            if error is None:
+                print(path + " -> " + output_path)
+            else:
+                failed += 1
+                print(path + ": " + error, file=sys.stderr)
+
+    print("{} exported, {} failed".format(len(tasks) - failed, failed))
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1524 @@
+#   Copyright (c) 2024 Wildan R Wijanarko (@wildan9)
+#
+#   Permission is hereby granted, free of charge, to any person obtaining a copy
+#   of this software and associated documentation files (the "Software"), to deal
+#   in the Software without restriction, including without limitation the rights
+#   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#   copies of the Software, and to permit persons to whom the Software is
+#   furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in all
+#   copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#   SOFTWARE.
+
+# Geometry core: vectors and Bezier math. Keep raylib out of the module level so this
+# imports fast and runs without a window, only the rl_* conversions load it.
+
+from collections import OrderedDict
+import math
+
+import numpy as np
+
+# ----------------------------------------------------------------
+# Vec2
+
+class Vec2:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+
+    def __repr__(self):
+        return f"Vec2({self.x}, {self.y})"
+
+    def __add__(self, other):
+        if isinstance(other, Vec2):
+            return Vec2(self.x + other.x, self.y + other.y)
+        else:
+            raise TypeError("Unsupported operand type for +: 'Vec2' and '{}'".format(type(other).__name__))
+
+    def __sub__(self, other):
+        if isinstance(other, Vec2):
+            return Vec2(self.x - other.x, self.y - other.y)
+        else:
+            raise TypeError("Unsupported operand type for -: 'Vec2' and '{}'".format(type(other).__name__))
+
+    def __mul__(self, other):
+        if isinstance(other, (int, float)):
+            return Vec2(self.x * other, self.y * other)
+        elif isinstance(other, Vec2):
+            return self.x * other.x + self.y * other.y  # Dot product
+        else:
+            raise TypeError("Unsupported operand type for *: 'Vec2' and '{}'".format(type(other).__name__))
+
+    def __truediv__(self, other):
+        if isinstance(other, (int, float)):
+            return Vec2(self.x / other, self.y / other)
+        else:
+            raise TypeError("Unsupported operand type for /: 'Vec2' and '{}'".format(type(other).__name__))
+
+    def magnitude(self):
+        return (self.x**2 + self.y**2) ** 0.5
+
+    def normalize(self):
+        mag = self.magnitude()
+        if mag == 0:
+            raise ValueError("Cannot normalize a zero vector")
+        return Vec2(self.x / mag, self.y / mag)
+
+    def lerp(self, other, t):
+        if isinstance(other, Vec2) and isinstance(t, (int, float)):
+            return Vec2(
+                self.x + (other.x - self.x) * t,
+                self.y + (other.y - self.y) * t
+            )
+        else:
+            raise TypeError("Unsupported operand types for lerp: 'Vec2', '{}', '{}'".format(type(other).__name__, type(t).__name__))
+
+    def to_tuple(self):
+        return (self.x, self.y)
+
+    #----------------------------------------------------------------
+    # In-place variants, these skip the type checks and never allocate
+
+    def set(self, x, y):
+        self.x = x
+        self.y = y
+        return self
+
+    def copy_from(self, other):
+        self.x = other.x
+        self.y = other.y
+        return self
+
+    def iadd(self, other):
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def isub(self, other):
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def scale_(self, s):
+        self.x *= s
+        self.y *= s
+        return self
+
+    def lerp_into(self, other, t, out):
+        out.x = self.x + (other.x - self.x) * t
+        out.y = self.y + (other.y - self.y) * t
+        return out
+
+    def distance_to(self, other):
+        if isinstance(other, Vec2):
+            return ((other.x - self.x)**2 + (other.y - self.y)**2) ** 0.5
+        else:
+            raise TypeError("Unsupported operand type for distance_to: 'Vec2' and '{}'".format(type(other).__name__))
+
+    def rl_vec(self, out=None):
+        # Pass "out" to refill an existing raylib vector instead of allocating one
+        if out is None:
+            from raylibpy import Vector2
+            return Vector2(self.x, self.y)
+        out.x = self.x
+        out.y = self.y
+        return out
+
+
+
+# ----------------------------------------------------------------
+# Vec2Array
+
+class Vec2Array(object):
+    # Struct-of-arrays storage for many 2D points, "data" is a contiguous (N, 2) float64 array
+    __slots__ = ("data",)
+
+    def __init__(self, data=None, size=0):
+        if data is None:
+            data = np.zeros((size, 2))
+        self.data = np.asarray(data, dtype=np.float64).reshape(-1, 2)
+
+    @classmethod
+    def from_vec2s(cls, vecs):
+        return cls(np.array([(v.x, v.y) for v in vecs], dtype=np.float64).reshape(-1, 2))
+
+    def to_vec2s(self):
+        return [Vec2(x, y) for x, y in self.data.tolist()]
+
+    def __repr__(self):
+        return f"Vec2Array({len(self.data)})"
+
+    def __len__(self):
+        return len(self.data)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.data if dtype is None else self.data.astype(dtype)
+
+    def __getitem__(self, index):
+        # Integers give a Vec2 copy, slices and masks give a Vec2Array (slices are views)
+        if isinstance(index, (int, np.integer)):
+            x, y = self.data[index].tolist()
+            return Vec2(x, y)
+        return Vec2Array(self.data[index])
+
+    def __setitem__(self, index, value):
+        self.data[index] = self._operand(value)
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    @staticmethod
+    def _operand(other):
+        if isinstance(other, Vec2):
+            return np.array((other.x, other.y), dtype=np.float64)
+        elif isinstance(other, Vec2Array):
+            return other.data
+        else:
+            return np.asarray(other, dtype=np.float64)
+
+    def copy(self):
+        return Vec2Array(self.data.copy())
+
+    def add(self, other):
+        return Vec2Array(self.data + self._operand(other))
+
+    def sub(self, other):
+        return Vec2Array(self.data - self._operand(other))
+
+    def scale(self, s):
+        return Vec2Array(self.data * np.reshape(s, (-1, 1)) if np.ndim(s) else self.data * s)
+
+    def iadd(self, other):
+        self.data += self._operand(other)
+        return self
+
+    def isub(self, other):
+        self.data -= self._operand(other)
+        return self
+
+    def scale_(self, s):
+        self.data *= np.reshape(s, (-1, 1)) if np.ndim(s) else s
+        return self
+
+    def lerp(self, other, t):
+        # "t" is a scalar or one value per point
+        t = np.reshape(t, (-1, 1)) if np.ndim(t) else t
+        return Vec2Array(self.data + (self._operand(other) - self.data) * t)
+
+    def transform(self, matrix):
+        # Accepts a 2x2 linear map or a 2x3 / 3x3 affine matrix acting on column vectors
+        matrix = np.asarray(matrix, dtype=np.float64)
+        result = self.data @ matrix[:2, :2].T
+        if matrix.shape[1] == 3:
+            result += matrix[:2, 2]
+        return Vec2Array(result)
+
+    def magnitude(self) -> np.ndarray:
+        return np.hypot(self.data[:, 0], self.data[:, 1])
+
+    def distance_to(self, other) -> np.ndarray:
+        delta = self._operand(other) - self.data
+        return np.hypot(delta[..., 0], delta[..., 1])
+
+
+
+# ----------------------------------------------------------------
+# Vec3
+
+class Vec3:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x=0, y=0, z=0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __repr__(self):
+        return f"Vec3({self.x}, {self.y}, {self.z})"
+
+    def __add__(self, other):
+        if isinstance(other, Vec3):
+            return Vec3(self.x + other.x, self.y + other.y, self.z + other.z)
+        else:
+            raise TypeError("Unsupported operand type for +: 'Vec3' and '{}'".format(type(other).__name__))
+
+    def __sub__(self, other):
+        if isinstance(other, Vec3):
+            return Vec3(self.x - other.x, self.y - other.y, self.z - other.z)
+        else:
+            raise TypeError("Unsupported operand type for -: 'Vec3' and '{}'".format(type(other).__name__))
+
+    def __mul__(self, other):
+        if isinstance(other, (int, float)):
+            return Vec3(self.x * other, self.y * other, self.z * other)
+        else:
+            raise TypeError("Unsupported operand type for *: 'Vec3' and '{}'".format(type(other).__name__))
+
+    def __truediv__(self, other):
+        if isinstance(other, (int, float)):
+            if other == 0:
+                raise ValueError("Cannot divide by zero.")
+            return Vec3(self.x / other, self.y / other, self.z / other)
+        else:
+            raise TypeError("Unsupported operand type for /: 'Vec3' and '{}'".format(type(other).__name__))
+
+    def magnitude(self):
+        return (self.x**2 + self.y**2 + self.z**2) ** 0.5
+
+    def normalize(self):
+        mag = self.magnitude()
+        if mag == 0:
+            raise ValueError("Cannot normalize a zero vector")
+        return Vec3(self.x / mag, self.y / mag, self.z / mag)
+
+    def lerp(self, other, t):
+        if isinstance(other, Vec3) and isinstance(t, (int, float)):
+            return Vec3(
+                self.x + (other.x - self.x) * t,
+                self.y + (other.y - self.y) * t,
+                self.z + (other.z - self.z) * t
+            )
+        else:
+            raise TypeError("Unsupported operand types for lerp: 'Vec3', '{}', '{}'".format(type(other).__name__, type(t).__name__))
+
+    def to_tuple(self):
+        return (self.x, self.y, self.z)
+
+    #----------------------------------------------------------------
+    # In-place variants, these skip the type checks and never allocate
+
+    def set(self, x, y, z):
+        self.x = x
+        self.y = y
+        self.z = z
+        return self
+
+    def copy_from(self, other):
+        self.x = other.x
+        self.y = other.y
+        self.z = other.z
+        return self
+
+    def iadd(self, other):
+        self.x += other.x
+        self.y += other.y
+        self.z += other.z
+        return self
+
+    def isub(self, other):
+        self.x -= other.x
+        self.y -= other.y
+        self.z -= other.z
+        return self
+
+    def scale_(self, s):
+        self.x *= s
+        self.y *= s
+        self.z *= s
+        return self
+
+    def lerp_into(self, other, t, out):
+        out.x = self.x + (other.x - self.x) * t
+        out.y = self.y + (other.y - self.y) * t
+        out.z = self.z + (other.z - self.z) * t
+        return out
+
+    def distance_to(self, other):
+        if isinstance(other, Vec3):
+            return ((other.x - self.x)**2 + (other.y - self.y)**2 + (other.z - self.z)**2) ** 0.5
+        else:
+            raise TypeError("Unsupported operand type for distance_to: 'Vec3' and '{}'".format(type(other).__name__))
+
+    def rl_vec(self, out=None):
+        if out is None:
+            from raylibpy import Vector3
+            return Vector3(self.x, self.y, self.z)
+        out.x = self.x
+        out.y = self.y
+        out.z = self.z
+        return out
+
+
+
+# ----------------------------------------------------------------
+# Quat
+
+class Quat:
+    __slots__ = ("w", "x", "y", "z")
+
+    def __init__(self, w=1, x=0, y=0, z=0):
+        self.w = w
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __repr__(self):
+        return f"Quat({self.w}, {self.x}, {self.y}, {self.z})"
+
+    def __add__(self, other):
+        if isinstance(other, Quat):
+            return Quat(self.w + other.w, self.x + other.x, self.y + other.y, self.z + other.z)
+        else:
+            raise TypeError("Unsupported operand type for +: 'Quat' and '{}'".format(type(other).__name__))
+
+    def __mul__(self, other):
+        if isinstance(other, Quat):
+            w = self.w * other.w - self.x * other.x - self.y * other.y - self.z * other.z
+            x = self.w * other.x + self.x * other.w + self.y * other.z - self.z * other.y
+            y = self.w * other.y - self.x * other.z + self.y * other.w + self.z * other.x
+            z = self.w * other.z + self.x * other.y - self.y * other.x + self.z * other.w
+            return Quat(w, x, y, z)
+        elif isinstance(other, (int, float)):
+            return Quat(self.w * other, self.x * other, self.y * other, self.z * other)
+        else:
+            raise TypeError("Unsupported operand type for *: 'Quat' and '{}'".format(type(other).__name__))
+
+    def magnitude(self):
+        return (self.w**2 + self.x**2 + self.y**2 + self.z**2) ** 0.5
+
+    def normalize(self):
+        mag = self.magnitude()
+        if mag == 0:
+            raise ValueError("Cannot normalize a zero quaternion")
+        return Quat(self.w / mag, self.x / mag, self.y / mag, self.z / mag)
+
+    def to_tuple(self):
+        return (self.w, self.x, self.y, self.z)
+
+    #----------------------------------------------------------------
+    # In-place variants, these skip the type checks and never allocate
+
+    def set(self, w, x, y, z):
+        self.w = w
+        self.x = x
+        self.y = y
+        self.z = z
+        return self
+
+    def imul(self, other):
+        w = self.w * other.w - self.x * other.x - self.y * other.y - self.z * other.z
+        x = self.w * other.x + self.x * other.w + self.y * other.z - self.z * other.y
+        y = self.w * other.y - self.x * other.z + self.y * other.w + self.z * other.x
+        z = self.w * other.z + self.x * other.y - self.y * other.x + self.z * other.w
+        return self.set(w, x, y, z)
+
+    def scale_(self, s):
+        self.w *= s
+        self.x *= s
+        self.y *= s
+        self.z *= s
+        return self
+
+    def normalize_(self):
+        mag = self.magnitude()
+        if mag == 0:
+            raise ValueError("Cannot normalize a zero quaternion")
+        return self.scale_(1.0 / mag)
+
+    def rl_quat(self):
+        from raylibpy import Quaternion
+        # raylib stores quaternions as (x, y, z, w)
+        return Quaternion(self.x, self.y, self.z, self.w)
+
+
+
+# ----------------------------------------------------------------
+# Bezier math
+
+# Cubic Bernstein basis in power form: B(t) = [1, t, t^2, t^3] @ CUBIC_BASIS @ [p0, p1, p2, p3]
+CUBIC_BASIS = np.array([
+    [ 1.0,  0.0,  0.0, 0.0],
+    [-3.0,  3.0,  0.0, 0.0],
+    [ 3.0, -6.0,  3.0, 0.0],
+    [-1.0,  3.0, -3.0, 1.0],
+])
+
+def vec2_array(points) -> np.ndarray:
+    return np.array([(p.x, p.y) for p in points], dtype=np.float64)
+
+def bezier_basis(ts) -> np.ndarray:
+    ts = np.asarray(ts, dtype=np.float64).reshape(-1)
+    powers = np.stack((np.ones_like(ts), ts, ts * ts, ts * ts * ts), axis=1)
+
+    return powers @ CUBIC_BASIS
+
+def bezier_points(ctrl, ts) -> np.ndarray:
+    # ctrl is (4, 2) for one curve or (M, 4, 2) for many, the result is (N, 2) or (M, N, 2)
+    ctrl = np.asarray(ctrl, dtype=np.float64)
+    if ctrl.shape[-2:] != (4, 2):
+        raise ValueError("Expected control points of shape (4, 2) or (M, 4, 2), got {}".format(ctrl.shape))
+
+    return np.ascontiguousarray(bezier_basis(ts) @ ctrl)
+
+def bezier_coeffs(ctrl) -> np.ndarray:
+    # Power-basis coefficients [c0, c1, c2, c3] with B(t) = c0 + c1 t + c2 t^2 + c3 t^3
+    return CUBIC_BASIS @ np.asarray(ctrl, dtype=np.float64)
+
+def forward_difference(coeffs, steps) -> np.ndarray:
+    # Samples the cubic at t = i / steps by accumulating its forward differences
+    # (the third difference is constant), so every sample costs a few additions
+    c0, c1, c2, c3 = coeffs
+    h = 1.0 / steps
+    d1 = c3 * h**3 + c2 * h**2 + c1 * h
+    d2 = 6.0 * c3 * h**3 + 2.0 * c2 * h**2
+    d3 = 6.0 * c3 * h**3
+
+    second = d2 + np.arange(steps - 1).reshape(-1, 1) * d3
+    first = np.empty((steps, 2))
+    first[0] = d1
+    np.cumsum(second, axis=0, out=first[1:])
+    first[1:] += d1
+
+    result = np.empty((steps + 1, 2))
+    result[0] = c0
+    np.cumsum(first, axis=0, out=result[1:])
+    result[1:] += c0
+
+    return result
+
+FLATTEN_MAX_DEPTH = 16
+
+def flatten_bezier(ctrl, tolerance) -> np.ndarray:
+    # Recursively halves the curve until every piece deviates from its chord by at most
+    # "tolerance", the flatness test is the cheap upper bound 16 * d^2 >= max(ux^2, vx^2) + max(uy^2, vy^2)
+    if tolerance <= 0.0:
+        raise ValueError("Flattening tolerance must be positive, got {}".format(tolerance))
+
+    limit = 16.0 * tolerance * tolerance
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = np.asarray(ctrl, dtype=np.float64).tolist()
+
+    polyline = [(x0, y0)]
+    stack = [(x0, y0, x1, y1, x2, y2, x3, y3, 0)]
+    while stack:
+        x0, y0, x1, y1, x2, y2, x3, y3, depth = stack.pop()
+
+        ux = 3.0 * x1 - 2.0 * x0 - x3
+        uy = 3.0 * y1 - 2.0 * y0 - y3
+        vx = 3.0 * x2 - 2.0 * x3 - x0
+        vy = 3.0 * y2 - 2.0 * y3 - y0
+
+        if depth >= FLATTEN_MAX_DEPTH or max(ux * ux, vx * vx) + max(uy * uy, vy * vy) <= limit:
+            polyline.append((x3, y3))
+            continue
+
+        # de Casteljau split at t = 0.5
+        ax, ay = (x0 + x1) * 0.5, (y0 + y1) * 0.5
+        bx, by = (x1 + x2) * 0.5, (y1 + y2) * 0.5
+        cx, cy = (x2 + x3) * 0.5, (y2 + y3) * 0.5
+        dx, dy = (ax + bx) * 0.5, (ay + by) * 0.5
+        ex, ey = (bx + cx) * 0.5, (by + cy) * 0.5
+        mx, my = (dx + ex) * 0.5, (dy + ey) * 0.5
+
+        # Right half first so the left half is popped (and emitted) first
+        stack.append((mx, my, ex, ey, cx, cy, x3, y3, depth + 1))
+        stack.append((x0, y0, ax, ay, dx, dy, mx, my, depth + 1))
+
+    return np.array(polyline)
+
+
+
+def cubic_bounds(ctrl) -> np.ndarray:
+    # Exact axis-aligned bounds [min_x, min_y, max_x, max_y] of one (4, 2) or many (M, 4, 2) curves.
+    # The extremes are at t = 0, t = 1 or a root in (0, 1) of the derivative a t^2 + b t + c per axis
+    ctrl = np.asarray(ctrl, dtype=np.float64)
+    single = ctrl.ndim == 2
+    ctrl = ctrl.reshape(-1, 4, 2)
+    p0, p1, p2, p3 = ctrl[:, 0], ctrl[:, 1], ctrl[:, 2], ctrl[:, 3]
+
+    a = 3.0 * (-p0 + 3.0 * p1 - 3.0 * p2 + p3)
+    b = 6.0 * (p0 - 2.0 * p1 + p2)
+    c = 3.0 * (p1 - p0)
+    discriminant = b * b - 4.0 * a * c
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        is_quadratic = np.abs(a) > 1e-12
+        sq = np.sqrt(np.maximum(discriminant, 0.0))
+        linear_root = np.where(np.abs(b) > 1e-12, -c / b, 0.0)
+        r1 = np.where(is_quadratic, (-b + sq) / (2.0 * a), linear_root)
+        r2 = np.where(is_quadratic, (-b - sq) / (2.0 * a), 0.0)
+
+    has_roots = ~is_quadratic | (discriminant >= 0.0)
+    r1 = np.where(has_roots & (r1 >= 0.0) & (r1 <= 1.0), r1, 0.0)
+    r2 = np.where(has_roots & (r2 >= 0.0) & (r2 <= 1.0), r2, 0.0)
+
+    # (M, 2 axes, 4 candidate t values)
+    ts = np.stack((np.zeros_like(r1), np.ones_like(r1), r1, r2), axis=-1)
+    c0, c1, c2, c3 = np.moveaxis(CUBIC_BASIS @ ctrl, 1, 0)[..., np.newaxis]
+    values = c0 + ts * (c1 + ts * (c2 + ts * c3))
+
+    bounds = np.concatenate((values.min(axis=-1), values.max(axis=-1)), axis=-1)
+
+    return bounds[0] if single else bounds
+
+def view_rect(target, offset, zoom, rotation, width, height) -> np.ndarray:
+    # World-space bounds [min_x, min_y, max_x, max_y] of a width x height screen seen through a 2D
+    # camera, "target" and "offset" only need .x / .y so raylib's Vector2 works as is
+    angle = -math.radians(rotation)
+    cos_a, sin_a = math.cos(angle), math.sin(angle)
+
+    xs, ys = [], []
+    for sx, sy in ((0.0, 0.0), (width, 0.0), (0.0, height), (width, height)):
+        dx = (sx - offset.x) / zoom
+        dy = (sy - offset.y) / zoom
+        xs.append(target.x + dx * cos_a - dy * sin_a)
+        ys.append(target.y + dx * sin_a + dy * cos_a)
+
+    return np.array((min(xs), min(ys), max(xs), max(ys)))
+
+def grid_lines(view, grid_size):
+    # World x and y positions of the grid lines inside a [min_x, min_y, max_x, max_y] view
+    first_x = math.floor(view[0] / grid_size)
+    first_y = math.floor(view[1] / grid_size)
+    xs = np.arange(first_x, math.floor(view[2] / grid_size) + 1) * float(grid_size)
+    ys = np.arange(first_y, math.floor(view[3] / grid_size) + 1) * float(grid_size)
+
+    return xs, ys
+
+def cull_bounds(bounds, view, margin=0.0):
+    # True for every bounds row that overlaps "view" grown by "margin"
+    bounds = np.asarray(bounds, dtype=np.float64)
+    return ((bounds[..., 0] <= view[2] + margin) & (bounds[..., 2] >= view[0] - margin) &
+            (bounds[..., 1] <= view[3] + margin) & (bounds[..., 3] >= view[1] - margin))
+
+PROJECT_CHUNK_SIZE = 4096
+
+def project_points(ctrl, queries, samples=32, iterations=4, seeds=3, lut=None):
+    # Closest point on the cubic for every row of an (N, 2) "queries" array, returns (ts, points, distances).
+    # The "seeds" nearest of samples + 1 uniform samples ("lut" may pass them in) are each refined with
+    # Newton steps on (B(t) - q) . B'(t) = 0 kept inside their sample bracket, the best one wins
+    queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+    c0, c1, c2, c3 = bezier_coeffs(ctrl)
+    if lut is None:
+        lut = forward_difference((c0, c1, c2, c3), samples)
+    samples = len(lut) - 1
+    seeds = min(seeds, samples + 1)
+
+    ts = np.empty(len(queries))
+    for start in range(0, len(queries), PROJECT_CHUNK_SIZE):
+        q = queries[start:start + PROJECT_CHUNK_SIZE, np.newaxis, :]
+
+        # Chunked so the (chunk, samples) distance matrix stays small
+        seed_distances = ((q - lut[np.newaxis]) ** 2).sum(axis=-1)
+        seed_index = np.argpartition(seed_distances, seeds - 1, axis=1)[:, :seeds]
+
+        t = seed_index / samples
+        low = np.maximum(seed_index - 1, 0) / samples
+        high = np.minimum(seed_index + 1, samples) / samples
+
+        for _ in range(iterations):
+            tt = t[..., np.newaxis]
+            diff = c0 + tt * (c1 + tt * (c2 + tt * c3)) - q
+            d1 = c1 + tt * (2.0 * c2 + 3.0 * tt * c3)
+            d2 = 2.0 * c2 + 6.0 * tt * c3
+
+            # Falls back to the Gauss-Newton step |B'|^2 where the full second derivative is not
+            # positive (queries near a centre of curvature), which still always moves downhill
+            f = (diff * d1).sum(axis=-1)
+            gauss = (d1 * d1).sum(axis=-1)
+            fp = gauss + (diff * d2).sum(axis=-1)
+            fp = np.where(fp > 0.0, fp, gauss)
+            step = np.divide(f, fp, out=np.zeros_like(f), where=fp > 1e-12)
+            t = np.clip(t - step, low, high)
+
+        tt = t[..., np.newaxis]
+        distances = ((c0 + tt * (c1 + tt * (c2 + tt * c3)) - q) ** 2).sum(axis=-1)
+        ts[start:start + PROJECT_CHUNK_SIZE] = t[np.arange(len(t)), distances.argmin(axis=1)]
+
+    tt = ts[:, np.newaxis]
+    points = c0 + tt * (c1 + tt * (c2 + tt * c3))
+    distances = np.hypot(*(points - queries).T)
+
+    return ts, points, distances
+
+def split_cubic(ctrl, t=0.5):
+    # de Casteljau split, returns the (4, 2) control points of the [0, t] and [t, 1] pieces
+    p0, p1, p2, p3 = np.asarray(ctrl, dtype=np.float64)
+    a = p0 + (p1 - p0) * t
+    b = p1 + (p2 - p1) * t
+    c = p2 + (p3 - p2) * t
+    d = a + (b - a) * t
+    e = b + (c - b) * t
+    m = d + (e - d) * t
+
+    return np.array((p0, a, d, m)), np.array((m, e, c, p3))
+
+def _split_half(c):
+    x0, y0, x1, y1, x2, y2, x3, y3 = c
+    ax, ay = (x0 + x1) * 0.5, (y0 + y1) * 0.5
+    bx, by = (x1 + x2) * 0.5, (y1 + y2) * 0.5
+    cx, cy = (x2 + x3) * 0.5, (y2 + y3) * 0.5
+    dx, dy = (ax + bx) * 0.5, (ay + by) * 0.5
+    ex, ey = (bx + cx) * 0.5, (by + cy) * 0.5
+    mx, my = (dx + ex) * 0.5, (dy + ey) * 0.5
+
+    return (x0, y0, ax, ay, dx, dy, mx, my), (mx, my, ex, ey, cx, cy, x3, y3)
+
+def _hull_box(c):
+    # The control polygon's box always contains the curve
+    xs, ys = c[0::2], c[1::2]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def _fat_line_separated(a, b):
+    # True when b's control points all lie on one side of the band around a's chord that holds
+    # a's control points, catches nearly parallel pieces whose boxes still overlap
+    x0, y0, x3, y3 = a[0], a[1], a[6], a[7]
+    nx, ny = y0 - y3, x3 - x0
+    length = math.hypot(nx, ny)
+    if length < 1e-12:
+        return False
+    nx, ny = nx / length, ny / length
+
+    da1 = nx * (a[2] - x0) + ny * (a[3] - y0)
+    da2 = nx * (a[4] - x0) + ny * (a[5] - y0)
+    d_min, d_max = min(0.0, da1, da2), max(0.0, da1, da2)
+
+    ds = [nx * (b[i] - x0) + ny * (b[i + 1] - y0) for i in (0, 2, 4, 6)]
+    return max(ds) < d_min or min(ds) > d_max
+
+def _merge_hits(leaves):
+    # Adjacent leaf boxes of one crossing come out as runs, merge the runs whose parameter
+    # intervals touch on both curves and report each merged run by its centre
+    leaves.sort()
+    clusters = []
+    for a0, a1, b0, b1 in leaves:
+        if clusters:
+            ca0, ca1, cb0, cb1 = clusters[-1]
+            if a0 <= ca1 + 1e-12 and b0 <= cb1 + 1e-12 and b1 >= cb0 - 1e-12:
+                clusters[-1] = (ca0, max(ca1, a1), min(cb0, b0), max(cb1, b1))
+                continue
+        clusters.append((a0, a1, b0, b1))
+
+    return [((a0 + a1) * 0.5, (b0 + b1) * 0.5) for a0, a1, b0, b1 in clusters]
+
+def _sub_cubic(ctrl, t0, t1):
+    # Control points of the piece of the cubic between t0 < t1
+    left, _ = split_cubic(ctrl, t1)
+    if t1 <= 0.0:
+        return left
+    _, piece = split_cubic(left, t0 / t1)
+    return piece
+
+def cubic_overlap(ctrl_a, ctrl_b, tolerance=1e-4):
+    # Shared stretch of two cubics as (a0, a1, b0, b1), or None. Two polynomial cubics that share
+    # a stretch are pieces of one curve, so the stretch runs between endpoints of one lying on the
+    # other, and the pieces of both between those points have the same control points
+    ctrl_a = np.asarray(ctrl_a, dtype=np.float64)
+    ctrl_b = np.asarray(ctrl_b, dtype=np.float64)
+
+    candidates = []
+    ts, _, distances = project_points(ctrl_a, ctrl_b[[0, 3]])
+    candidates += [(t, u) for t, u, d in zip(ts.tolist(), (0.0, 1.0), distances.tolist()) if d <= tolerance]
+    ts, _, distances = project_points(ctrl_b, ctrl_a[[0, 3]])
+    candidates += [(t, u) for u, t, d in zip(ts.tolist(), (0.0, 1.0), distances.tolist()) if d <= tolerance]
+    if len(candidates) < 2:
+        return None
+
+    (a0, b0), (a1, b1) = min(candidates), max(candidates)
+    if a1 - a0 < 1e-9 or abs(b1 - b0) < 1e-9:
+        return None
+
+    piece_a = _sub_cubic(ctrl_a, a0, a1)
+    piece_b = _sub_cubic(ctrl_b, b0, b1) if b0 < b1 else _sub_cubic(ctrl_b, b1, b0)[::-1]
+    if np.abs(piece_a - piece_b).max() > tolerance:
+        return None
+
+    return (a0, a1, b0, b1)
+
+# After this many overlapping piece pairs the curves are checked for a shared stretch. Past the
+# cap every piece pair still overlapping becomes a leaf without further splitting, so curves that
+# run closer than the tolerance can resolve cannot stall, their hits are then only approximate
+OVERLAP_CHECK_PAIRS = 256
+INTERSECT_MAX_PAIRS = 16384
+
+def _intersect_cubics(ctrl_a, ctrl_b, tolerance, max_depth, max_pairs):
+    # Returns (hits, overlap), see intersect_cubics and cubic_overlap
+    root_a = tuple(np.asarray(ctrl_a, dtype=np.float64).ravel().tolist())
+    root_b = tuple(np.asarray(ctrl_b, dtype=np.float64).ravel().tolist())
+
+    leaves = []
+    pair_count = 0
+    stack = [(root_a, 0.0, 1.0, root_b, 0.0, 1.0, 0)]
+    while stack:
+        a, a0, a1, b, b0, b1, depth = stack.pop()
+
+        ax0, ay0, ax1, ay1 = _hull_box(a)
+        bx0, by0, bx1, by1 = _hull_box(b)
+        if ax1 < bx0 or bx1 < ax0 or ay1 < by0 or by1 < ay0:
+            continue
+        if _fat_line_separated(a, b) or _fat_line_separated(b, a):
+            continue
+
+        pair_count += 1
+        if pair_count == OVERLAP_CHECK_PAIRS:
+            overlap = cubic_overlap(ctrl_a, ctrl_b, tolerance)
+            if overlap is not None:
+                return [], overlap
+
+        a_size = max(ax1 - ax0, ay1 - ay0)
+        b_size = max(bx1 - bx0, by1 - by0)
+        if depth >= max_depth or pair_count >= max_pairs or (a_size <= tolerance and b_size <= tolerance):
+            leaves.append((a0, a1, b0, b1))
+            continue
+
+        # Only the larger piece is halved, which keeps the branching factor at two
+        if a_size >= b_size:
+            left, right = _split_half(a)
+            am = (a0 + a1) * 0.5
+            stack.append((left, a0, am, b, b0, b1, depth + 1))
+            stack.append((right, am, a1, b, b0, b1, depth + 1))
+        else:
+            left, right = _split_half(b)
+            bm = (b0 + b1) * 0.5
+            stack.append((a, a0, a1, left, b0, bm, depth + 1))
+            stack.append((a, a0, a1, right, bm, b1, depth + 1))
+
+    return _merge_hits(leaves), None
+
+def intersect_cubics(ctrl_a, ctrl_b, tolerance=1e-4, max_depth=80, max_pairs=INTERSECT_MAX_PAIRS):
+    # Recursive subdivision of both curves with control-box rejection, returns sorted (t_a, t_b) pairs.
+    # Pieces stop splitting once both boxes are smaller than "tolerance" (in curve units). Curves
+    # sharing a stretch have no isolated crossings and return [], cubic_overlap reports the stretch
+    hits, _ = _intersect_cubics(ctrl_a, ctrl_b, tolerance, max_depth, max_pairs)
+    return hits
+
+def intersect_cubic_line(ctrl, p0, p1):
+    # Crossings of a cubic with the segment p0 -> p1 (anything with .x / .y), returns sorted (t, u)
+    # pairs with t on the curve and u on the segment. Solved exactly as the roots of the curve's
+    # signed distance to the line, which is a cubic in t
+    c0, c1, c2, c3 = bezier_coeffs(ctrl)
+    origin = np.array((p0.x, p0.y), dtype=np.float64)
+    direction = np.array((p1.x - p0.x, p1.y - p0.y), dtype=np.float64)
+    length_sq = direction @ direction
+    if length_sq == 0.0:
+        return []
+
+    def _cross(v):
+        return direction[0] * v[1] - direction[1] * v[0]
+
+    poly = np.array((_cross(c3), _cross(c2), _cross(c1), _cross(c0 - origin)))
+    scale = np.abs(poly).max()
+    if scale == 0.0:
+        return []
+    poly = np.trim_zeros(poly / scale, "f")
+    if len(poly) < 2:
+        return []
+
+    hits = []
+    for root in np.roots(poly):
+        if abs(root.imag) > 1e-9:
+            continue
+        t = float(root.real)
+        if -1e-12 <= t <= 1.0 + 1e-12:
+            t = min(max(t, 0.0), 1.0)
+            point = c0 + t * (c1 + t * (c2 + t * c3))
+            u = float((point - origin) @ direction / length_sq)
+            if -1e-12 <= u <= 1.0 + 1e-12:
+                hits.append((t, min(max(u, 0.0), 1.0)))
+
+    return sorted(hits)
+
+def intersect_all(ctrls, tolerance=1e-4):
+    # All crossings between every pair of (M, 4, 2) curves, returns (hits, overlaps) with hits as
+    # (i, j, t_i, t_j) and shared stretches as (i, j, t_i0, t_i1, t_j0, t_j1), always i < j.
+    # Broad phase is a sweep over the exact curve bounds sorted by min x
+    ctrls = np.asarray(ctrls, dtype=np.float64).reshape(-1, 4, 2)
+    bounds = cubic_bounds(ctrls)
+    order = np.argsort(bounds[:, 0], kind="stable")
+
+    pairs = []
+    active = []
+    for i in order.tolist():
+        min_x, min_y, _, max_y = bounds[i]
+        active = [j for j in active if bounds[j, 2] >= min_x]
+        for j in active:
+            if bounds[j, 1] <= max_y and bounds[j, 3] >= min_y:
+                pairs.append((min(i, j), max(i, j)))
+        active.append(i)
+
+    hits, overlaps = [], []
+    for i, j in sorted(pairs):
+        pair_hits, overlap = _intersect_cubics(ctrls[i], ctrls[j], tolerance, 80, INTERSECT_MAX_PAIRS)
+        for t_i, t_j in pair_hits:
+            hits.append((i, j, t_i, t_j))
+        if overlap is not None:
+            overlaps.append((i, j) + overlap)
+
+    return hits, overlaps
+
+def polyline_strip(polyline, thick) -> np.ndarray:
+    # Expands a polyline into triangle strip vertices [r0, l0, r1, l1, ...] offset by half
+    # "thick" along the averaged segment normals, ordered so raylib sees counter-clockwise triangles
+    polyline = np.asarray(polyline, dtype=np.float64)
+    segments = np.diff(polyline, axis=0)
+    lengths = np.hypot(segments[:, 0], segments[:, 1]).reshape(-1, 1)
+    normals = np.stack((-segments[:, 1], segments[:, 0]), axis=1) / np.maximum(lengths, 1e-12)
+
+    vertex_normals = np.empty_like(polyline)
+    vertex_normals[0] = normals[0]
+    vertex_normals[-1] = normals[-1]
+    vertex_normals[1:-1] = normals[:-1] + normals[1:]
+    vertex_normals /= np.maximum(np.hypot(vertex_normals[:, 0], vertex_normals[:, 1]), 1e-12).reshape(-1, 1)
+
+    offsets = vertex_normals * (thick * 0.5)
+    strip = np.empty((len(polyline) * 2, 2))
+    strip[0::2] = polyline - offsets
+    strip[1::2] = polyline + offsets
+
+    return strip
+
+
+
+# ----------------------------------------------------------------
+# ArcLengthTable
+
+class ArcLengthTable(object):
+    def __init__(self, polyline):
+        # "polyline" is sampled at uniform t, so row i sits at t = i / (len - 1)
+        segments = np.hypot(*np.diff(polyline, axis=0).T)
+        self.distances = np.concatenate(([0.0], np.cumsum(segments)))
+        self.ts = np.linspace(0.0, 1.0, len(polyline))
+        self.length = float(self.distances[-1])
+
+    def t_at_distance(self, distance):
+        # Binary search over the cumulative distances plus linear interpolation, works on arrays too
+        return np.interp(distance, self.distances, self.ts)
+
+    def distance_at_t(self, t):
+        return np.interp(t, self.ts, self.distances)
+
+
+
+# ----------------------------------------------------------------
+# CubicBezier
+
+class CubicBezier(object):
+    def __init__(self, p0, p1, p2, p3):
+        self.points = [p0, p1, p2, p3]
+
+        # Set whenever a control point moves, the caches below are rebuilt lazily
+        self._is_dirty = True
+        self._coeffs = None
+        self._polylines = {}
+        self._flattened = (None, None)
+        self._arc_length_table = None
+        self._bounds = None
+
+    def mark_dirty(self):
+        self._is_dirty = True
+
+    def set_points(self, p0, p1, p2, p3):
+        self.points = [p0, p1, p2, p3]
+        self._is_dirty = True
+
+    def _refresh(self):
+        if self._is_dirty:
+            self._coeffs = bezier_coeffs(vec2_array(self.points))
+            self._polylines.clear()
+            self._flattened = (None, None)
+            self._arc_length_table = None
+            self._bounds = None
+            self._is_dirty = False
+
+    def coeffs(self) -> np.ndarray:
+        self._refresh()
+
+        return self._coeffs
+
+    def evaluate(self, t) -> Vec2:
+        c0, c1, c2, c3 = self.coeffs()
+        x = c0[0] + t * (c1[0] + t * (c2[0] + t * c3[0]))
+        y = c0[1] + t * (c1[1] + t * (c2[1] + t * c3[1]))
+
+        return Vec2(float(x), float(y))
+
+    def tessellate(self, steps) -> np.ndarray:
+        self._refresh()
+        polyline = self._polylines.get(steps)
+        if polyline is None:
+            polyline = forward_difference(self._coeffs, steps)
+            self._polylines[steps] = polyline
+
+        return polyline
+
+    def flatten(self, tolerance) -> np.ndarray:
+        self._refresh()
+        cached_tolerance, polyline = self._flattened
+        if cached_tolerance != tolerance:
+            polyline = flatten_bezier(vec2_array(self.points), tolerance)
+            self._flattened = (tolerance, polyline)
+
+        return polyline
+
+    def arc_length_table(self, samples=256) -> ArcLengthTable:
+        self._refresh()
+        if self._arc_length_table is None:
+            self._arc_length_table = ArcLengthTable(self.tessellate(samples))
+
+        return self._arc_length_table
+
+    def length(self) -> float:
+        return self.arc_length_table().length
+
+    def bounds(self) -> np.ndarray:
+        self._refresh()
+        if self._bounds is None:
+            self._bounds = cubic_bounds(vec2_array(self.points))
+
+        return self._bounds
+
+    def is_visible(self, view, margin=0.0) -> bool:
+        return bool(cull_bounds(self.bounds(), view, margin))
+
+    def intersect(self, other, tolerance=1e-4):
+        return intersect_cubics(vec2_array(self.points), vec2_array(other.points), tolerance)
+
+    def overlap(self, other, tolerance=1e-4):
+        return cubic_overlap(vec2_array(self.points), vec2_array(other.points), tolerance)
+
+    def intersect_line(self, p0, p1):
+        # e.g. curve.intersect_line(simple_line.p0.pos, simple_line.p1.pos)
+        return intersect_cubic_line(vec2_array(self.points), p0, p1)
+
+    def project(self, queries, samples=32, iterations=4, seeds=3):
+        # Seeds from the cached uniform tessellation, see project_points
+        return project_points(vec2_array(self.points), queries, samples, iterations, seeds, lut=self.tessellate(samples))
+
+
+
+# ----------------------------------------------------------------
+# CubicBezier3D
+
+# raylib meshes index vertices with unsigned shorts
+MESH_MAX_VERTICES = 65536
+
+def vec3_array(points) -> np.ndarray:
+    return np.array([(p.x, p.y, p.z) for p in points], dtype=np.float64)
+
+def bezier_tangents(ctrl, ts) -> np.ndarray:
+    # First derivative of one (4, D) cubic at every t, unnormalized
+    ctrl = np.asarray(ctrl, dtype=np.float64)
+    ts = np.asarray(ts, dtype=np.float64).reshape(-1, 1)
+    d0, d1, d2 = np.diff(ctrl, axis=0)
+    u = 1.0 - ts
+
+    return 3.0 * (u * u * d0 + 2.0 * u * ts * d1 + ts * ts * d2)
+
+def _normalize_rows(vectors, fallback):
+    lengths = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.where(lengths > 1e-12, vectors / np.maximum(lengths, 1e-12), fallback)
+
+def parallel_transport_frames(points, tangents):
+    # Rotation minimizing (T, N, B) frames along a polyline using the double reflection method,
+    # unlike Frenet frames they do not flip at inflections or spin on straight parts
+    # A zero derivative (p0 == p1 or p2 == p3) has no direction, the chord to the neighbouring
+    # sample stands in for it, this has to happen before normalizing turns it into the fallback
+    tangents = np.array(tangents, dtype=np.float64)
+    chords = np.diff(points, axis=0)
+    for i in np.flatnonzero(np.linalg.norm(tangents, axis=-1) <= 1e-12):
+        if len(chords):
+            tangents[i] = chords[max(i - 1, 0)]
+    tangents = _normalize_rows(tangents, np.array([0.0, 0.0, 1.0]))
+
+    # Start from the world axis least aligned with the first tangent
+    axis = np.eye(3)[np.argmin(np.abs(tangents[0]))]
+    normals = np.empty_like(tangents)
+    normals[0] = _normalize_rows(axis - np.dot(axis, tangents[0]) * tangents[0], axis)
+
+    for i in range(1, len(points)):
+        v1 = points[i] - points[i - 1]
+        c1 = np.dot(v1, v1)
+        if c1 < 1e-24:
+            normals[i] = normals[i - 1]
+            continue
+
+        r = normals[i - 1] - (2.0 / c1) * np.dot(v1, normals[i - 1]) * v1
+        t = tangents[i - 1] - (2.0 / c1) * np.dot(v1, tangents[i - 1]) * v1
+        v2 = tangents[i] - t
+        c2 = np.dot(v2, v2)
+        normals[i] = r if c2 < 1e-24 else r - (2.0 / c2) * np.dot(v2, r) * v2
+
+    binormals = np.cross(tangents, normals)
+
+    return tangents, normals, binormals
+
+class TubeMesh(object):
+    # Plain arrays in the layout raylib's Mesh expects, uploading is left to the caller
+    def __init__(self, vertices, normals, texcoords, indices):
+        self.vertices  = vertices   # (V, 3) float32
+        self.normals   = normals    # (V, 3) float32
+        self.texcoords = texcoords  # (V, 2) float32
+        self.indices   = indices    # (3 T,) uint16
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def triangle_count(self) -> int:
+        return len(self.indices) // 3
+
+def tube_mesh(points, normals, binormals, radius, sides) -> TubeMesh:
+    # A ring of sides + 1 vertices per sample, the seam is duplicated so texcoords wrap cleanly
+    rings, ring_size = len(points), sides + 1
+    if rings * ring_size > MESH_MAX_VERTICES:
+        raise ValueError("A tube of {} rings and {} sides has more than {} vertices".format(rings, sides, MESH_MAX_VERTICES))
+
+    angles = np.linspace(0.0, 2.0 * np.pi, ring_size)
+    directions = (np.cos(angles)[:, np.newaxis, np.newaxis] * normals + np.sin(angles)[:, np.newaxis, np.newaxis] * binormals).transpose(1, 0, 2)
+    vertices = points[:, np.newaxis] + radius * directions
+
+    u, v = np.meshgrid(np.linspace(0.0, 1.0, ring_size), np.linspace(0.0, 1.0, rings))
+    texcoords = np.stack((u, v), axis=-1)
+
+    # Two counter-clockwise (seen from outside) triangles per quad between ring i and ring i + 1
+    a = (np.arange(rings - 1)[:, np.newaxis] * ring_size + np.arange(sides)).ravel()
+    b = a + ring_size
+    indices = np.stack((a, a + 1, b, a + 1, b + 1, b), axis=-1).ravel()
+
+    return TubeMesh(
+        np.ascontiguousarray(vertices.reshape(-1, 3), dtype=np.float32),
+        np.ascontiguousarray(directions.reshape(-1, 3), dtype=np.float32),
+        np.ascontiguousarray(texcoords.reshape(-1, 2), dtype=np.float32),
+        indices.astype(np.uint16),
+    )
+
+class CubicBezier3D(object):
+    def __init__(self, p0, p1, p2, p3):
+        self.points = [p0, p1, p2, p3]
+
+        # Set whenever a control point moves, the caches below are rebuilt lazily
+        self._is_dirty = True
+        self._ctrl = None
+        self._frames = {}
+        self._tubes = {}
+
+    def mark_dirty(self):
+        self._is_dirty = True
+
+    def set_points(self, p0, p1, p2, p3):
+        self.points = [p0, p1, p2, p3]
+        self._is_dirty = True
+
+    def _refresh(self):
+        if self._is_dirty:
+            self._ctrl = vec3_array(self.points)
+            self._frames.clear()
+            self._tubes.clear()
+            self._is_dirty = False
+
+    def ctrl(self) -> np.ndarray:
+        self._refresh()
+
+        return self._ctrl
+
+    def evaluate(self, t) -> Vec3:
+        x, y, z = (bezier_basis([t]) @ self.ctrl())[0].tolist()
+        return Vec3(x, y, z)
+
+    def sample(self, samples) -> np.ndarray:
+        return bezier_basis(np.linspace(0.0, 1.0, samples)) @ self.ctrl()
+
+    def frames(self, samples=64):
+        # (points, tangents, normals, binormals), each (samples, 3)
+        self._refresh()
+        frames = self._frames.get(samples)
+        if frames is None:
+            ts = np.linspace(0.0, 1.0, samples)
+            points = bezier_basis(ts) @ self._ctrl
+            frames = (points,) + parallel_transport_frames(points, bezier_tangents(self._ctrl, ts))
+            self._frames[samples] = frames
+
+        return frames
+
+    def tube(self, radius=0.1, samples=64, sides=12) -> TubeMesh:
+        # The same TubeMesh object comes back until a control point moves, callers can key uploads on it
+        self._refresh()
+        key = (radius, samples, sides)
+        mesh = self._tubes.get(key)
+        if mesh is None:
+            points, _, normals, binormals = self.frames(samples)
+            mesh = tube_mesh(points, normals, binormals, radius, sides)
+            self._tubes[key] = mesh
+
+        return mesh
+
+
+
+# ----------------------------------------------------------------
+# SpatialGrid
+
+class SpatialGrid(object):
+    # Uniform grid over 2D points, ids are hashable keys chosen by the caller
+    def __init__(self, cell_size=64.0):
+        self.cell_size = float(cell_size)
+        self._cells = {}
+        self._items = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item_id):
+        return item_id in self._items
+
+    def _cell(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def clear(self):
+        self._cells.clear()
+        self._items.clear()
+
+    def insert(self, item_id, x, y):
+        if item_id in self._items:
+            self.move(item_id, x, y)
+            return
+
+        cell = self._cell(x, y)
+        self._items[item_id] = (x, y, cell)
+        self._cells.setdefault(cell, set()).add(item_id)
+
+    def remove(self, item_id):
+        _, _, cell = self._items.pop(item_id)
+        bucket = self._cells[cell]
+        bucket.discard(item_id)
+        if not bucket:
+            del self._cells[cell]
+
+    def move(self, item_id, x, y):
+        # Only touches the buckets when the item crosses into another cell
+        _, _, old_cell = self._items[item_id]
+        cell = self._cell(x, y)
+        if cell != old_cell:
+            bucket = self._cells[old_cell]
+            bucket.discard(item_id)
+            if not bucket:
+                del self._cells[old_cell]
+            self._cells.setdefault(cell, set()).add(item_id)
+        self._items[item_id] = (x, y, cell)
+
+    def position(self, item_id):
+        x, y, _ = self._items[item_id]
+        return (x, y)
+
+    def query(self, x, y, radius):
+        # Ids of every item within "radius" of (x, y)
+        min_cx, min_cy = self._cell(x - radius, y - radius)
+        max_cx, max_cy = self._cell(x + radius, y + radius)
+        radius_sq = radius * radius
+
+        result = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                for item_id in self._cells.get((cx, cy), ()):
+                    ix, iy, _ = self._items[item_id]
+                    if (ix - x) * (ix - x) + (iy - y) * (iy - y) <= radius_sq:
+                        result.append(item_id)
+
+        return result
+
+    def nearest(self, x, y, radius):
+        # Closest item within "radius" of (x, y), or None
+        best_id = None
+        best_sq = radius * radius
+        for item_id in self.query(x, y, radius):
+            ix, iy, _ = self._items[item_id]
+            distance_sq = (ix - x) * (ix - x) + (iy - y) * (iy - y)
+            if best_id is None or distance_sq < best_sq:
+                best_id, best_sq = item_id, distance_sq
+
+        return best_id
+
+
+
+# ----------------------------------------------------------------
+# BezierCurve (any degree)
+
+BASIS_CACHE_SIZE = 64
+
+# (degree, samples) -> read-only (samples, degree + 1) Bernstein matrix, least recently used first
+_basis_cache = OrderedDict()
+
+def bernstein_basis_at(degree, ts) -> np.ndarray:
+    ts = np.asarray(ts, dtype=np.float64).reshape(-1, 1)
+    k = np.arange(degree + 1)
+    binomials = np.array([math.comb(degree, i) for i in k], dtype=np.float64)
+
+    return binomials * ts**k * (1.0 - ts)**(degree - k)
+
+def bernstein_matrix(degree, samples) -> np.ndarray:
+    # Basis at "samples" uniform t values in [0, 1], cached per (degree, samples) with LRU eviction
+    key = (degree, samples)
+    matrix = _basis_cache.get(key)
+    if matrix is not None:
+        _basis_cache.move_to_end(key)
+        return matrix
+
+    matrix = bernstein_basis_at(degree, np.linspace(0.0, 1.0, samples))
+    matrix.setflags(write=False)
+    _basis_cache[key] = matrix
+    while len(_basis_cache) > BASIS_CACHE_SIZE:
+        _basis_cache.popitem(last=False)
+
+    return matrix
+
+def sample_curves(ctrls, samples) -> np.ndarray:
+    # Uniform samples of one (n + 1, 2) or many (M, n + 1, 2) curves of the same degree
+    ctrls = np.asarray(ctrls, dtype=np.float64)
+    return np.ascontiguousarray(bernstein_matrix(ctrls.shape[-2] - 1, samples) @ ctrls)
+
+def elevation_matrix(degree) -> np.ndarray:
+    # (degree + 2, degree + 1) matrix taking degree n control points to equivalent degree n + 1 ones
+    n = degree + 1
+    matrix = np.zeros((n + 1, n))
+    for i in range(n + 1):
+        if i > 0:
+            matrix[i, i - 1] = i / n
+        if i < n:
+            matrix[i, i] = 1.0 - i / n
+
+    return matrix
+
+class BezierCurve(object):
+    def __init__(self, points):
+        # "points" is a list of Vec2 or anything shaped (n + 1, 2), n >= 1
+        if len(points) and isinstance(points[0], Vec2):
+            points = vec2_array(points)
+        self.points = np.array(points, dtype=np.float64).reshape(-1, 2)
+        if len(self.points) < 2:
+            raise ValueError("A Bezier curve needs at least 2 control points, got {}".format(len(self.points)))
+
+    def __repr__(self):
+        return f"BezierCurve(degree={self.degree})"
+
+    @property
+    def degree(self) -> int:
+        return len(self.points) - 1
+
+    @classmethod
+    def from_cubic(cls, cubic):
+        return cls(cubic.points)
+
+    def to_cubic(self) -> CubicBezier:
+        if self.degree != 3:
+            raise ValueError("Only a degree 3 curve converts to CubicBezier, got degree {}".format(self.degree))
+        return CubicBezier(*[Vec2(x, y) for x, y in self.points.tolist()])
+
+    def evaluate(self, ts) -> np.ndarray:
+        if self.degree == 3:
+            return bezier_points(self.points, ts)
+        return bernstein_basis_at(self.degree, ts) @ self.points
+
+    def sample(self, samples) -> np.ndarray:
+        return sample_curves(self.points, samples)
+
+    def point_at(self, t) -> Vec2:
+        x, y = self._de_casteljau(t)[-1][0].tolist()
+        return Vec2(x, y)
+
+    def _de_casteljau(self, t):
+        levels = [self.points]
+        while len(levels[-1]) > 1:
+            level = levels[-1]
+            levels.append(level[:-1] + (level[1:] - level[:-1]) * t)
+        return levels
+
+    def split(self, t=0.5):
+        levels = self._de_casteljau(t)
+        left = np.array([level[0] for level in levels])
+        right = np.array([level[-1] for level in reversed(levels)])
+
+        return BezierCurve(left), BezierCurve(right)
+
+    def derivative(self):
+        if self.degree == 1:
+            return BezierCurve(np.repeat(self.points[1:] - self.points[:1], 2, axis=0))
+        return BezierCurve(self.degree * np.diff(self.points, axis=0))
+
+    def elevate(self):
+        return BezierCurve(elevation_matrix(self.degree) @ self.points)
+
+    def reduce(self):
+        # Least-squares inverse of elevate(), exact when the curve came from an elevation
+        if self.degree < 2:
+            raise ValueError("Cannot reduce a degree {} curve".format(self.degree))
+        reduced, _, _, _ = np.linalg.lstsq(elevation_matrix(self.degree - 1), self.points, rcond=None)
+        return BezierCurve(reduced)
+
+
+
+# ----------------------------------------------------------------
+# TransformGraph
+
+def quat_matrices(rotations) -> np.ndarray:
+    # (N, 4) unit quaternions as (w, x, y, z) to (N, 3, 3) rotation matrices
+    w, x, y, z = np.asarray(rotations, dtype=np.float64).T
+    return np.stack([
+        1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - w * z),       2.0 * (x * z + w * y),
+        2.0 * (x * y + w * z),       1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - w * x),
+        2.0 * (x * z - w * y),       2.0 * (y * z + w * x),       1.0 - 2.0 * (x * x + y * y),
+    ], axis=-1).reshape(-1, 3, 3)
+
+def trs_matrices(positions, rotations, scales) -> np.ndarray:
+    # (N, 4, 4) translate @ rotate @ scale matrices for column vectors, translation in the last column
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    matrices = np.zeros((len(positions), 4, 4))
+    matrices[:, :3, :3] = quat_matrices(rotations) * np.asarray(scales, dtype=np.float64).reshape(-1, 1, 3)
+    matrices[:, :3, 3] = positions
+    matrices[:, 3, 3] = 1.0
+
+    return matrices
+
+class TransformGraph(object):
+    # Parent/child transforms stored as flat arrays. A node's parent is always added before it, so
+    # walking the nodes depth by depth updates every parent before its children, one batch per depth.
+    def __init__(self, capacity=64):
+        self._count = 0
+
+        self._positions     = np.zeros((0, 3))
+        self._rotations     = np.zeros((0, 4))
+        self._scales        = np.zeros((0, 3))
+        self._local         = np.zeros((0, 4, 4))
+        self._world         = np.zeros((0, 4, 4))
+        self._parents       = np.zeros(0, dtype=np.int64)
+        self._depths        = np.zeros(0, dtype=np.int64)
+        self._world_version = np.zeros(0, dtype=np.int64)
+        self._local_dirty   = np.zeros(0, dtype=bool)
+        self._world_dirty   = np.zeros(0, dtype=bool)
+        self._allocate(capacity)
+
+        # Nodes grouped by depth, rebuilt when a node is added
+        self._levels = None
+        self._is_dirty = False
+
+        # Bumped by every update that recomputes something, world_version tells callers what changed
+        self.version = 0
+
+    def _allocate(self, capacity):
+        def _grow(array, fill):
+            grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            grown[:self._count] = array[:self._count]
+            return grown
+
+        self._positions     = _grow(self._positions, 0.0)
+        self._rotations     = _grow(self._rotations, 0.0)
+        self._scales        = _grow(self._scales, 1.0)
+        self._local         = _grow(self._local, 0.0)
+        self._world         = _grow(self._world, 0.0)
+        self._parents       = _grow(self._parents, -1)
+        self._depths        = _grow(self._depths, 0)
+        self._world_version = _grow(self._world_version, 0)
+        self._local_dirty   = _grow(self._local_dirty, False)
+        self._world_dirty   = _grow(self._world_dirty, False)
+
+    def __len__(self):
+        return self._count
+
+    def add(self, parent=-1, pos=(0.0, 0.0, 0.0), rot=(1.0, 0.0, 0.0, 0.0), scale=(1.0, 1.0, 1.0)) -> int:
+        if not -1 <= parent < self._count:
+            raise ValueError("Unknown parent node {}".format(parent))
+        if self._count == len(self._parents):
+            self._allocate(2 * len(self._parents))
+
+        node = self._count
+        self._count += 1
+        self._parents[node] = parent
+        self._depths[node] = 0 if parent < 0 else self._depths[parent] + 1
+        self._levels = None
+        self.set_local(node, pos, rot, scale)
+
+        return node
+
+    def parent(self, node) -> int:
+        return int(self._parents[node])
+
+    def set_local(self, node, pos, rot, scale):
+        # rot is (w, x, y, z), the node and everything below it is recomputed on the next update
+        self._positions[node] = pos
+        self._rotations[node] = rot
+        self._scales[node] = scale
+        self.mark_dirty(node)
+
+    def mark_dirty(self, nodes=None):
+        # After writing to positions(), rotations() or scales() directly, None marks every node
+        if nodes is None:
+            self._local_dirty[:self._count] = True
+        else:
+            self._local_dirty[nodes] = True
+        self._is_dirty = True
+
+    def positions(self) -> np.ndarray: return self._positions[:self._count]
+    def rotations(self) -> np.ndarray: return self._rotations[:self._count]
+    def scales(self) -> np.ndarray: return self._scales[:self._count]
+
+    def _depth_levels(self):
+        if self._levels is None:
+            depths = self._depths[:self._count]
+            order = np.argsort(depths, kind="stable")
+            splits = np.flatnonzero(np.diff(depths[order])) + 1
+            self._levels = np.split(order, splits)
+        return self._levels
+
+    def update(self):
+        if not self._is_dirty:
+            return
+
+        n = self._count
+        local_dirty = np.flatnonzero(self._local_dirty[:n])
+        if len(local_dirty):
+            self._local[local_dirty] = trs_matrices(self._positions[local_dirty], self._rotations[local_dirty], self._scales[local_dirty])
+
+        world_dirty = self._world_dirty[:n]
+        world_dirty[:] = self._local_dirty[:n]
+        self.version += 1
+
+        # Levels above the shallowest dirty node cannot change
+        first_level = int(self._depths[local_dirty].min()) if len(local_dirty) else len(self._depth_levels())
+        for level in self._depth_levels()[first_level:]:
+            parents = self._parents[level]
+            has_parent = parents >= 0
+            world_dirty[level[has_parent]] |= world_dirty[parents[has_parent]]
+
+            dirty = level[world_dirty[level]]
+            if not len(dirty):
+                continue
+
+            dirty_parents = self._parents[dirty]
+            roots = dirty[dirty_parents < 0]
+            children = dirty[dirty_parents >= 0]
+            self._world[roots] = self._local[roots]
+            self._world[children] = self._world[self._parents[children]] @ self._local[children]
+            self._world_version[dirty] = self.version
+
+        self._local_dirty[:n] = False
+        self._is_dirty = False
+
+    def local(self, node) -> np.ndarray:
+        self.update()
+        return self._local[node]
+
+    def world(self, node) -> np.ndarray:
+        self.update()
+        return self._world[node]
+
+    def world_matrices(self) -> np.ndarray:
+        self.update()
+        return self._world[:self._count]
+
+    def world_version(self, node) -> int:
+        # Changes whenever the node's world matrix is recomputed
+        self.update()
+        return int(self._world_version[node])
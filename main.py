@@ -19,9 +19,23 @@
 #   SOFTWARE.
 
 from raylibpy import *
+from collections import OrderedDict
+from datetime import datetime
+import ctypes
+import os
+import queue
+import sys
+import threading
+import numpy as np
+
+from profiler import FrameProfiler
+from scene import Scene, load_scene, save_scene
+from geometry import CubicBezier, CubicBezier3D, SpatialGrid, TransformGraph, Quat, Vec2, Vec3, grid_lines, polyline_strip, view_rect
 
 g_app_should_close = False
 
+SCENE_PATH = "scene.bzs"
+
 def draw_button(text, button_rec, is_clickable=True):
     mouse_pos = get_mouse_position()
     is_mouse_over = check_collision_point_rec(mouse_pos, button_rec)
@@ -65,216 +79,216 @@ def draw_checkbox(text, rec, flag):
 
 
 # ----------------------------------------------------------------
-# Point
+# Batched drawing
 
-class Point:
-    def __init__(self, pos, size, color, name):
-        self.id    = 0
-        self.pos   = pos
-        self.size  = size
-        self.color = color
-        self.name  = name
-    
-    def draw(self):
-        pos = "x: " + str(round(self.pos.x, 2)) + " " + "y: " + str(round(self.pos.y, 2))
-        draw_circle(self.pos.x, self.pos.y, self.size, self.color)
-        draw_text(self.name, self.pos.x - 5, self.pos.y - 5, 15, BLACK)
-        draw_text(pos, self.pos.x + 25, self.pos.y + 10, 12, BLACK)
+def rl_vector2_buffer(points):
+    # Packs an (N, 2) array into a contiguous Vector2[N] that raylib can read in one call
+    points = np.ascontiguousarray(points, dtype=np.float32)
+    buffer = (Vector2 * len(points))()
+    ctypes.memmove(buffer, points.ctypes.data, points.nbytes)
+
+    return buffer
+
+def draw_polyline(points, color, buffer=None):
+    if len(points) < 2:
+        return
+    if buffer is None:
+        buffer = rl_vector2_buffer(points)
+    draw_line_strip(buffer, len(points), color)
+
+def draw_polyline_ex(points, thick, color):
+    if len(points) < 2:
+        return
+    strip = polyline_strip(points, thick)
+    draw_triangle_strip(rl_vector2_buffer(strip), len(strip), color)
 
 
 
 # ----------------------------------------------------------------
-# Vec2
+# LabelCache
 
-class Vec2:
-    def __init__(self, x=0, y=0):
-        self.x = x
-        self.y = y
+class LabelCache(object):
+    def __init__(self, max_size=512):
+        self.max_size = max_size
 
-    def __repr__(self):
-        return f"Vec2({self.x}, {self.y})"
+        # (text, font size) -> RenderTexture2D with the text drawn in white, least recently used first
+        self._textures = OrderedDict()
 
-    def __add__(self, other):
-        if isinstance(other, Vec2):
-            return Vec2(self.x + other.x, self.y + other.y)
-        else:
-            raise TypeError("Unsupported operand type for +: 'Vec2' and '{}'".format(type(other).__name__))
+        # A label gets a texture once it is requested in two frames in a row, so text that
+        # changes every frame (a point being dragged) keeps using draw_text
+        self._seen_now  = set()
+        self._seen_last = set()
+        self._pending   = set()
 
-    def __sub__(self, other):
-        if isinstance(other, Vec2):
-            return Vec2(self.x - other.x, self.y - other.y)
-        else:
-            raise TypeError("Unsupported operand type for -: 'Vec2' and '{}'".format(type(other).__name__))
+    def draw(self, text, x, y, font_size, color):
+        key = (text, font_size)
+        target = self._textures.get(key)
 
-    def __mul__(self, other):
-        if isinstance(other, (int, float)):
-            return Vec2(self.x * other, self.y * other)
-        elif isinstance(other, Vec2):
-            return self.x * other.x + self.y * other.y  # Dot product
-        else:
-            raise TypeError("Unsupported operand type for *: 'Vec2' and '{}'".format(type(other).__name__))
+        if target is None:
+            if key in self._seen_last:
+                self._pending.add(key)
+            self._seen_now.add(key)
+            draw_text(text, x, y, font_size, color)
+            return
 
-    def __truediv__(self, other):
-        if isinstance(other, (int, float)):
-            return Vec2(self.x / other, self.y / other)
-        else:
-            raise TypeError("Unsupported operand type for /: 'Vec2' and '{}'".format(type(other).__name__))
-
-    def magnitude(self):
-        return (self.x**2 + self.y**2) ** 0.5
-
-    def normalize(self):
-        mag = self.magnitude()
-        if mag == 0:
-            raise ValueError("Cannot normalize a zero vector")
-        return Vec2(self.x / mag, self.y / mag)
-
-    def lerp(self, other, t):
-        if isinstance(other, Vec2) and isinstance(t, (int, float)):
-            return Vec2(
-                self.x + (other.x - self.x) * t,
-                self.y + (other.y - self.y) * t
-            )
-        else:
-            raise TypeError("Unsupported operand types for lerp: 'Vec2', '{}', '{}'".format(type(other).__name__, type(t).__name__))
+        self._textures.move_to_end(key)
 
-    def to_tuple(self):
-        return (self.x, self.y)
+        # Render textures are stored upside down, hence the negative source height
+        texture = target.texture
+        draw_texture_rec(texture, Rectangle(0, 0, texture.width, -texture.height), Vector2(x, y), color)
 
-    def distance_to(self, other):
-        if isinstance(other, Vec2):
-            return ((other.x - self.x)**2 + (other.y - self.y)**2) ** 0.5
-        else:
-            raise TypeError("Unsupported operand type for distance_to: 'Vec2' and '{}'".format(type(other).__name__))
+    def flush(self):
+        # Renders the pending labels, must be called outside of any begin_mode2d/begin_mode3d block
+        for text, font_size in self._pending:
+            target = load_render_texture(max(1, measure_text(text, font_size)), font_size)
+            begin_texture_mode(target)
+            clear_background(BLANK)
+            draw_text(text, 0, 0, font_size, WHITE)
+            end_texture_mode()
 
-    def rl_vec(self):
-        return Vector2(self.x, self.y)
+            self._textures[(text, font_size)] = target
 
+        while len(self._textures) > self.max_size:
+            _, target = self._textures.popitem(last=False)
+            unload_render_texture(target)
 
+        self._pending.clear()
+        self._seen_last, self._seen_now = self._seen_now, self._seen_last
+        self._seen_now.clear()
 
-# ----------------------------------------------------------------
-# Vec3
+    def unload(self):
+        for target in self._textures.values():
+            unload_render_texture(target)
+        self._textures.clear()
 
-class Vec3:
-    def __init__(self, x=0, y=0, z=0):
-        self.x = x
-        self.y = y
-        self.z = z
+g_label_cache = LabelCache()
 
-    def __repr__(self):
-        return f"Vec3({self.x}, {self.y}, {self.z})"
 
-    def __add__(self, other):
-        if isinstance(other, Vec3):
-            return Vec3(self.x + other.x, self.y + other.y, self.z + other.z)
-        else:
-            raise TypeError("Unsupported operand type for +: 'Vec3' and '{}'".format(type(other).__name__))
 
-    def __sub__(self, other):
-        if isinstance(other, Vec3):
-            return Vec3(self.x - other.x, self.y - other.y, self.z - other.z)
-        else:
-            raise TypeError("Unsupported operand type for -: 'Vec3' and '{}'".format(type(other).__name__))
+# ----------------------------------------------------------------
+# ScreenshotWriter
 
-    def __mul__(self, other):
-        if isinstance(other, (int, float)):
-            return Vec3(self.x * other, self.y * other, self.z * other)
-        else:
-            raise TypeError("Unsupported operand type for *: 'Vec3' and '{}'".format(type(other).__name__))
+class ScreenshotWriter(object):
+    def __init__(self, max_pending=4):
+        # Captured images waiting to be encoded, a capture is dropped when the queue is full
+        self._queue  = queue.Queue(maxsize=max_pending)
+        self._thread = None
 
-    def __truediv__(self, other):
-        if isinstance(other, (int, float)):
-            if other == 0:
-                raise ValueError("Cannot divide by zero.")
-            return Vec3(self.x / other, self.y / other, self.z / other)
-        else:
-            raise TypeError("Unsupported operand type for /: 'Vec3' and '{}'".format(type(other).__name__))
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
 
-    def magnitude(self):
-        return (self.x**2 + self.y**2 + self.z**2) ** 0.5
+            image, file_name = item
+            export_image(image, file_name)
+            unload_image(image)
 
-    def normalize(self):
-        mag = self.magnitude()
-        if mag == 0:
-            raise ValueError("Cannot normalize a zero vector")
-        return Vec3(self.x / mag, self.y / mag, self.z / mag)
+    def capture(self):
+        # Only copies the framebuffer into memory, the PNG encode and the disk write happen on the writer thread
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ScreenshotWriter", daemon=True)
+            self._thread.start()
 
-    def to_tuple(self):
-        return (self.x, self.y, self.z)
+        file_name = datetime.now().strftime("screenshot_%Y%m%d_%H%M%S_%f.png")
+        image = load_image_from_screen()
+        try:
+            self._queue.put_nowait((image, file_name))
+        except queue.Full:
+            unload_image(image)
+            return None
 
-    def distance_to(self, other):
-        if isinstance(other, Vec3):
-            return ((other.x - self.x)**2 + (other.y - self.y)**2 + (other.z - self.z)**2) ** 0.5
-        else:
-            raise TypeError("Unsupported operand type for distance_to: 'Vec3' and '{}'".format(type(other).__name__))
+        return file_name
 
-    def rl_vec(self):
-        return Vector3(self.x, self.y, self.z)
+    def stop(self):
+        # Writes whatever is still queued before returning
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
 
+g_screenshot_writer = ScreenshotWriter()
 
 
-# ----------------------------------------------------------------
-# Quat
 
-class Quat:
-    def __init__(self, w=1, x=0, y=0, z=0):
-        self.w = w
-        self.x = x
-        self.y = y
-        self.z = z
+# ----------------------------------------------------------------
+# Point
 
-    def __repr__(self):
-        return f"Quat({self.w}, {self.x}, {self.y}, {self.z})"
+class Point:
+    def __init__(self, pos, size, color, name):
+        self.id    = 0
+        self.pos   = pos
+        self.size  = size
+        self.color = color
+        self.name  = name
 
-    def __add__(self, other):
-        if isinstance(other, Quat):
-            return Quat(self.w + other.w, self.x + other.x, self.y + other.y, self.z + other.z)
-        else:
-            raise TypeError("Unsupported operand type for +: 'Quat' and '{}'".format(type(other).__name__))
-
-    def __mul__(self, other):
-        if isinstance(other, Quat):
-            w = self.w * other.w - self.x * other.x - self.y * other.y - self.z * other.z
-            x = self.w * other.x + self.x * other.w + self.y * other.z - self.z * other.y
-            y = self.w * other.y - self.x * other.z + self.y * other.w + self.z * other.x
-            z = self.w * other.z + self.x * other.y - self.y * other.x + self.z * other.w
-            return Quat(w, x, y, z)
-        elif isinstance(other, (int, float)):
-            return Quat(self.w * other, self.x * other, self.y * other, self.z * other)
-        else:
-            raise TypeError("Unsupported operand type for *: 'Quat' and '{}'".format(type(other).__name__))
+        # Coordinate readout, rebuilt only when the point moves
+        self._label     = ""
+        self._label_pos = None
 
-    def magnitude(self):
-        return (self.w**2 + self.x**2 + self.y**2 + self.z**2) ** 0.5
+    def draw(self):
+        if self._label_pos != (self.pos.x, self.pos.y):
+            self._label_pos = (self.pos.x, self.pos.y)
+            self._label = "x: " + str(round(self.pos.x, 2)) + " " + "y: " + str(round(self.pos.y, 2))
 
-    def normalize(self):
-        mag = self.magnitude()
-        if mag == 0:
-            raise ValueError("Cannot normalize a zero quaternion")
-        return Quat(self.w / mag, self.x / mag, self.y / mag, self.z / mag)
+        draw_circle(self.pos.x, self.pos.y, self.size, self.color)
+        g_label_cache.draw(self.name, self.pos.x - 5, self.pos.y - 5, 15, BLACK)
+        g_label_cache.draw(self._label, self.pos.x + 25, self.pos.y + 10, 12, BLACK)
 
-    def to_tuple(self):
-        return (self.w, self.x, self.y, self.z)
 
-    def rl_quat(self):
-        return Quaternion(self.w, self.x, self.y, self.z)
 
 # ----------------------------------------------------------------
 # Matrix transform
 
 def matrix_translate_v(vec_pos: Vec3) -> Matrix: return matrix_translate(vec_pos.x, vec_pos.y, vec_pos.z)
-def matrix_scale_v(vec_scale: Vec3) -> Matrix: return matrix_translate(vec_scale.x, vec_scale.y, vec_scale.z)
+def matrix_scale_v(vec_scale: Vec3) -> Matrix: return matrix_scale(vec_scale.x, vec_scale.y, vec_scale.z)
+
+g_transform_graph = TransformGraph()
 
 class Transform3D():
-    def __init__(self, pos: Vec3=Vec3(), rot: Quat=Quat(), scale: Vec3=Vec3()):
-        self.pos: Vec3   = pos
-        self.rot: Quat   = rot
-        self.scale: Vec3 = scale
+    def __init__(self, pos: Vec3=None, rot: Quat=None, scale: Vec3=None, parent=None, graph=None):
+        self.pos: Vec3   = pos if pos is not None else Vec3()
+        self.rot: Quat   = rot if rot is not None else Quat()
+        self.scale: Vec3 = scale if scale is not None else Vec3(1, 1, 1)
+
+        # Every transform is a node in a graph, a child uses its parent's graph
+        self.parent = parent
+        if graph is None:
+            graph = parent.graph if parent is not None else g_transform_graph
+        self.graph = graph
+        self.node = graph.add(parent.node if parent is not None else -1)
+        self.mark_dirty()
+
+        # Matrices handed to raylib, rebuilt only when the world matrix changes
+        self._version = -1
+        self._matrix = None
+        self._float_v = None
+
+    def mark_dirty(self):
+        # Call after changing pos, rot or scale, this node and its children are recomputed on the next draw
+        self.graph.set_local(self.node, (self.pos.x, self.pos.y, self.pos.z), (self.rot.w, self.rot.x, self.rot.y, self.rot.z), (self.scale.x, self.scale.y, self.scale.z))
+
+    def world_matrix(self) -> np.ndarray:
+        return self.graph.world(self.node)
+
+    def _refresh(self):
+        version = self.graph.world_version(self.node)
+        if version != self._version:
+            world = self.world_matrix()
+            self._version = version
+            self._matrix = Matrix(*world.ravel().tolist())
+
+            # rl_mult_matrixf takes the column-major layout of matrix_to_float_v
+            self._float_v = (ctypes.c_float * 16)(*world.ravel(order="F").tolist())
 
     def to_matrix(self) -> Matrix:
-        def _mul(a, b) -> Matrix: return matrix_multiply(a, b)
+        self._refresh()
+        return self._matrix
 
-        return _mul(_mul(matrix_translate_v(self.pos), quaternion_to_matrix(self.rot.rl_quat())), matrix_scale_v(self.scale))
+    def to_float_v(self):
+        self._refresh()
+        return self._float_v
 
 
 
@@ -372,6 +386,10 @@ class RLCamera2D(Camera2D):
 
         return self
 
+    def view_rect(self):
+        # Visible world area as [min_x, min_y, max_x, max_y]
+        return view_rect(self.target, self.offset, self.zoom, self.rotation, get_screen_width(), get_screen_height())
+
     def update(self, target):
         self.target = target
 
@@ -382,6 +400,63 @@ class RLCamera2D(Camera2D):
 
 
 
+# ----------------------------------------------------------------
+# GridRenderer
+
+class GridRenderer(object):
+    # World-aligned infinite grid for the 2D camera. The lines covering the screen (plus one cell)
+    # are rendered once into a texture that is only rebuilt when the zoom or screen size changes,
+    # panning just slides the texture by less than a cell. Assumes an unrotated camera
+    def __init__(self, grid_size, color=DARKGRAY):
+        self.grid_size = grid_size
+        self.color = color
+        self._target = None
+        self._key = None
+
+    def _rebuild(self, cell_px, width, height):
+        if self._target is not None:
+            unload_render_texture(self._target)
+
+        columns = int(width / cell_px) + 2
+        rows = int(height / cell_px) + 2
+        self._target = load_render_texture(int(columns * cell_px) + 1, int(rows * cell_px) + 1)
+        texture = self._target.texture
+
+        begin_texture_mode(self._target)
+        clear_background(BLANK)
+        for i in range(columns + 1):
+            x = int(round(i * cell_px))
+            draw_line(x, 0, x, texture.height, self.color)
+        for i in range(rows + 1):
+            y = int(round(i * cell_px))
+            draw_line(0, y, texture.width, y, self.color)
+        end_texture_mode()
+
+    def draw(self, camera):
+        width, height = get_screen_width(), get_screen_height()
+        cell_px = self.grid_size * camera.zoom
+
+        key = (round(cell_px, 3), width, height)
+        if key != self._key:
+            self._rebuild(cell_px, width, height)
+            self._key = key
+
+        # Screen position of the first grid line left of / above the view
+        xs, ys = grid_lines(camera.view_rect(), self.grid_size)
+        screen_x = int(round((xs[0] - camera.target.x) * camera.zoom + camera.offset.x))
+        screen_y = int(round((ys[0] - camera.target.y) * camera.zoom + camera.offset.y))
+
+        texture = self._target.texture
+        draw_texture_rec(texture, Rectangle(0, 0, texture.width, -texture.height), Vector2(screen_x, screen_y), WHITE)
+
+    def unload(self):
+        if self._target is not None:
+            unload_render_texture(self._target)
+            self._target = None
+            self._key = None
+
+
+
 # ----------------------------------------------------------------
 # 3D Camera
 
@@ -459,16 +534,18 @@ class MenuBar():
         self._file_rec              = Rectangle(0, 0, 50, 30)
         self._mode_rec              = Rectangle(50, 0, 50, 30)
         self._view_rec              = Rectangle(100, 0, 50, 30)
-        self._file_item_num         = 2
+        self._file_item_num         = 4
         self._mode_item_num         = 4
         self._view_item_num         = 2
-        self._file_str_item         = ["Export to PNG", "Exit"]
+        self._file_str_item         = ["Export to PNG", "Save Scene", "Load Scene", "Exit"]
         self._mode_str_item         = ["Simple Line", "Bézier Curve", "2D Object", "3D Object"]
         self._view_str_item         = ["Windowed", "Fullscreen"]
         self._file_btn_on_press     = False
         self._mode_btn_on_press     = False
         self._view_btn_on_press     = False
         self._is_fullscreen         = False
+        self._is_save_scene         = False
+        self._is_load_scene         = False
         
         # Only for some buttons
         self._view_btn_state = [False, True]
@@ -476,11 +553,16 @@ class MenuBar():
         self._current_mode = 0
     
     def get_current_mode(self) -> int: return self._current_mode
+    def is_save_scene(self) -> bool: return self._is_save_scene
+    def is_load_scene(self) -> bool: return self._is_load_scene
 
     def draw(self):
         global g_app_should_close
         mouse_pos = get_mouse_position()
 
+        self._is_save_scene = False
+        self._is_load_scene = False
+
         #----------------------------------------------------------------
         # Draw the background
         bg_pos = Vec2(0, 0)
@@ -497,9 +579,15 @@ class MenuBar():
                 self._file_btn_on_press = draw_button(self._file_str_item[i], Rectangle(self._file_rec.x, self._file_rec.y + 30 * (i + 1), self._file_rec.width + 50, self._file_rec.height))
 
                 if self._file_btn_on_press and i == 0:
-                    take_screenshot("screenshot.png")
+                    g_screenshot_writer.capture()
 
                 if self._file_btn_on_press and i == 1:
+                    self._is_save_scene = True
+
+                if self._file_btn_on_press and i == 2:
+                    self._is_load_scene = True
+
+                if self._file_btn_on_press and i == 3:
                     g_app_should_close = True
 
         if check_collision_point_rec(mouse_pos, self._file_rec) and is_mouse_button_pressed(MOUSE_BUTTON_LEFT):
@@ -542,6 +630,60 @@ class MenuBar():
 
 
 
+# ----------------------------------------------------------------
+# PointPicker
+
+class PointPicker(object):
+    # Mouse dragging of Points, hit-tested through a SpatialGrid instead of a linear scan
+    def __init__(self, points, cell_size=64.0):
+        self.points = points
+        self.is_dragging = False
+        self._lock_id = -1
+        self._index = SpatialGrid(cell_size)
+        self.rebuild()
+
+    def rebuild(self):
+        # Call when points are added, removed, resized or their pos objects are replaced
+        self._index.clear()
+        for i, point in enumerate(self.points):
+            point.id = i
+            self._index.insert(i, point.pos.x, point.pos.y)
+
+        # Search radius for picking, the largest point decides it
+        self._max_size = max((point.size for point in self.points), default=0)
+
+    def update(self, world_mouse_pos):
+        # Returns the point that moved this frame, or None
+        if self.is_dragging:
+            if is_mouse_button_released(MOUSE_LEFT_BUTTON):
+                self.is_dragging = False
+                self._lock_id = -1
+                return None
+        elif is_mouse_button_down(MOUSE_LEFT_BUTTON):
+            for i in self._index.query(world_mouse_pos.x, world_mouse_pos.y, self._max_size):
+                point = self.points[i]
+                if point.pos.distance_to(Vec2(world_mouse_pos.x, world_mouse_pos.y)) <= point.size:
+                    self._lock_id = i
+                    self.is_dragging = True
+                    break
+            else:
+                return None
+        else:
+            return None
+
+        # Holding the mouse still keeps the point and the caches built from it untouched
+        point = self.points[self._lock_id]
+        if point.pos.x == world_mouse_pos.x and point.pos.y == world_mouse_pos.y:
+            return None
+
+        point.pos.x = world_mouse_pos.x
+        point.pos.y = world_mouse_pos.y
+        self._index.move(self._lock_id, point.pos.x, point.pos.y)
+
+        return point
+
+
+
 # ----------------------------------------------------------------
 # SimpleLine
 
@@ -557,14 +699,12 @@ class SimpleLine(object):
         self.p1 = Point(Vec2(x1, y1), int(20), BROWN, "P1")
 
         self._points = [self.p0, self.p1]
-        self._point_radius = float(0.0)
-
-        self._is_dragging = False
-        
-        self._lock_id = int()
+        self._picker = PointPicker(self._points)
 
-        for i in range(0, 2):
-            self._points[i].id = i
+        # Reused raylib vectors for drawing
+        self._rl_start = Vector2(0, 0)
+        self._rl_end   = Vector2(0, 0)
+        self._rl_t     = Vector2(0, 0)
         
         self.t = 0.0
     
@@ -573,25 +713,7 @@ class SimpleLine(object):
         # Update the points position
         mouse_pos = get_mouse_position()
         world_mouse_pos = get_screen_to_world2d(mouse_pos, camera)
-
-        for point in self._points:
-            if self._is_dragging:
-                self._point_radius = point.size * 3.0
-            else:
-                self._point_radius = point.size
-
-            if check_collision_point_circle(world_mouse_pos, point.pos.rl_vec(), self._point_radius) and is_mouse_button_down(MOUSE_LEFT_BUTTON) and not self._is_dragging:
-                self._lock_id = point.id
-                if self._lock_id == point.id:
-                    self._is_dragging = True
-            
-            elif is_mouse_button_released(MOUSE_LEFT_BUTTON):
-                self._is_dragging = False
-                self._lock_id = -1
-
-            if self._is_dragging and point.id == self._lock_id:
-                point.pos.x = world_mouse_pos.x
-                point.pos.y = world_mouse_pos.y
+        self._picker.update(world_mouse_pos)
 
         self.x0 = self.p0.pos.x 
         self.y0 = self.p0.pos.y
@@ -605,9 +727,15 @@ class SimpleLine(object):
         self.dx = self.x0 + (self.x1 - self.x0) * self.t
         self.dy = self.y0 + (self.y1 - self.y0) * self.t
 
+    def is_animating(self):
+        return True
+
     def draw(self):
-        draw_line_ex(Vec2(self.x0, self.y0).rl_vec(), Vec2(self.x1, self.y1).rl_vec(), 7.0, LIGHTGRAY)
-        draw_line_ex(Vec2(self.x0, self.y0).rl_vec(), Vec2(self.dx, self.dy).rl_vec(), 7.0, RED)
+        self._rl_start.x, self._rl_start.y = self.x0, self.y0
+        self._rl_end.x, self._rl_end.y     = self.x1, self.y1
+        self._rl_t.x, self._rl_t.y         = self.dx, self.dy
+        draw_line_ex(self._rl_start, self._rl_end, 7.0, LIGHTGRAY)
+        draw_line_ex(self._rl_start, self._rl_t, 7.0, RED)
         self.p0.draw()
         self.p1.draw()
 
@@ -622,20 +750,32 @@ class BezierObject(object):
         self._p1 = Point(Vec2(80,  100), int(20), LIME, str("P1"))
         self._p2 = Point(Vec2(320, 100), int(20), LIME, str("P2"))
         self._p3 = Point(Vec2(300, 200), int(20), LIME, str("P3"))
+        # _p0 appears twice so _draw_points closes the control polygon, picking uses each point once
         self._points = [self._p0, self._p0, self._p1, self._p2, self._p3]
-        self._point_radius = float(0.0)
+        self._picker = PointPicker([self._p0, self._p1, self._p2, self._p3])
 
-        self._is_dragging = False
-        
-        self._lock_id = int()
+        self._curve = CubicBezier(self._p0.pos, self._p1.pos, self._p2.pos, self._p3.pos)
 
-        for i in range(0, 5):
-            self._points[i].id = i
+        # Scratch de Casteljau points and raylib vectors, reused every frame
+        self._abcde = [Vec2(), Vec2(), Vec2(), Vec2(), Vec2()]
+        self._bezier_scratch = [Vec2(), Vec2(), Vec2(), Vec2(), Vec2()]
+        self._rl_abcde = [Vector2(0, 0), Vector2(0, 0), Vector2(0, 0), Vector2(0, 0), Vector2(0, 0)]
+
+        # Max distance in pixels between the drawn polyline and the true curve
+        self._flatten_tolerance = 0.25
+        # Trail width in world units, it scales with the camera zoom like the curve itself
+        self._trail_width = 7.0
+        self._zoom = 1.0
+        self._curve_buffer = (None, None)
+
+        # Visible world area from the last update, None draws everything
+        self._view = None
 
         self._ball = Point(Vec2(100.0 * 1.5, 200.0 * 2.0), int(12), BLUE, str("Ball"))
         self._is_ball_pause = False
         self._is_ball_manual_mode = False
         self._is_ball_forward = True
+        self._is_constant_speed = False
 
         self._is_reset_ball = False
         self._is_reset_points = False
@@ -648,7 +788,7 @@ class BezierObject(object):
         self._at = 0.0 # Automatic "t"
         self._mt = 0.0 # Manual "t"
 
-        self._slider_mt_pos = Vec2(10, get_screen_height() / 2)
+        self._slider_mt_pos = Vec2(10, 90 + 40 * 7 + 30)
         self._slider_mt = SimpleSlider(Rectangle(self._slider_mt_pos.x, self._slider_mt_pos.y, 150, 30))
 
         # Objects colors
@@ -674,25 +814,26 @@ class BezierObject(object):
         # Menu bar
         self._menu_bar = MenuBar()
 
-    def _bezier(self, p0, p1, p2, p3, t) -> Vec2:
-        a = p0.lerp(p1, t)
-        b = p1.lerp(p2, t)
-        c = p2.lerp(p3, t)
-        d = a.lerp(b, t)
-        e = b.lerp(c, t)
+    def _bezier(self, p0, p1, p2, p3, t, out=None) -> Vec2:
+        a, b, c, d, e = self._bezier_scratch
+        p0.lerp_into(p1, t, a)
+        p1.lerp_into(p2, t, b)
+        p2.lerp_into(p3, t, c)
+        a.lerp_into(b, t, d)
+        b.lerp_into(c, t, e)
+
+        return d.lerp_into(e, t, Vec2() if out is None else out)
 
-        result = d.lerp(e, t)
+    def _draw_bezier(self, curve, tolerance):
+        polyline = curve.flatten(tolerance)
 
-        return result
+        # The flattened polyline is cached on the curve, so its raylib buffer can be kept too
+        cached_polyline, buffer = self._curve_buffer
+        if cached_polyline is not polyline:
+            buffer = rl_vector2_buffer(polyline)
+            self._curve_buffer = (polyline, buffer)
 
-    def _draw_bezier(self, p0, p1, p2, p3):
-        t = 0.0
-        while t <= 1.0:
-            start_pos = self._bezier(p0.pos, p1.pos, p2.pos, p3.pos, t)
-            t += 0.01
-            end_pos = self._bezier(p0.pos, p1.pos, p2.pos, p3.pos, t)
-            draw_line_v(start_pos.rl_vec(), end_pos.rl_vec(), BLACK)
-            t += 0.01
+        draw_polyline(polyline, BLACK, buffer)
 
     def _draw_points(self, points, points_color, lines_color_0, lines_color_1, t):
         for i in range(0, 5):
@@ -719,13 +860,14 @@ class BezierObject(object):
             draw_line_ex(start_pos.rl_vec(), end_pos.rl_vec(), 5.0, lines_color_0)
             draw_line_ex(start_pos.rl_vec(), Vec2(dx, dy).rl_vec(), 3.0, lines_color_1)
 
-        start_pos = points[0].pos
         steps = 100
-        for i in range(1, int(t * steps) + 1):
-            step_t = i / steps
-            start_pos = self._bezier(points[1].pos, points[2].pos, points[3].pos, points[4].pos, step_t)
-            draw_line_ex(start_pos.rl_vec(), end_pos.rl_vec(), 7.0, PURPLE)
-            end_pos = start_pos
+        if self._is_curve_visible():
+            trail = self._curve.tessellate(steps)[:int(t * steps) + 1]
+            draw_polyline_ex(trail, self._trail_width, PURPLE)
+
+    def _is_curve_visible(self):
+        # The margin covers half of the trail width, both are in world units so zoom does not enter
+        return self._view is None or self._curve.is_visible(self._view, 0.5 * self._trail_width)
 
     def update(self, camera):
         def _get_random_color(self) -> Color: return self._colors[get_random_value(0, self._colors_length)]
@@ -756,7 +898,8 @@ class BezierObject(object):
 
         #----------------------------------------------------------------
         # Update the "t"
-        delta_time = 0.3 * get_frame_time()      
+        # Clamped so the first frame after an idle wait does not jump the ball
+        delta_time = 0.3 * min(get_frame_time(), 0.1)
         if not self._is_ball_pause and not self._is_ball_manual_mode:
             self._mt = self._t
             if self._is_ball_forward:
@@ -774,12 +917,16 @@ class BezierObject(object):
 
         if self._is_ball_manual_mode:
             self._t = self._mt
+        elif self._is_constant_speed:
+            # "_at" is the travelled fraction of the curve length instead of a raw "t"
+            table = self._curve.arc_length_table()
+            self._t = float(table.t_at_distance(self._at * table.length))
         else:
             self._t = self._at
 
         #----------------------------------------------------------------
         # Update the ball position and color
-        new_ball_pos = self._bezier(self._p0.pos, self._p1.pos, self._p2.pos, self._p3.pos, self._t)
+        new_ball_pos = self._curve.evaluate(self._t)
         self._ball.pos = new_ball_pos
 
         if self._is_reset_ball:
@@ -792,31 +939,42 @@ class BezierObject(object):
         # Update the points position
         mouse_pos = get_mouse_position()
         world_mouse_pos = get_screen_to_world2d(mouse_pos, camera)
+        self._zoom = camera.zoom
+        self._view = camera.view_rect()
 
-        for point in self._points:
-            if self._is_dragging:
-                self._point_radius = point.size * 3.0
-            else:
-                self._point_radius = point.size
-
-            if check_collision_point_circle(world_mouse_pos, point.pos.rl_vec(), self._point_radius) and is_mouse_button_down(MOUSE_LEFT_BUTTON) and not self._is_dragging:
-                self._lock_id = point.id
-                if self._lock_id == point.id:
-                    self._is_dragging = True
-            
-            elif is_mouse_button_released(MOUSE_LEFT_BUTTON):
-                self._is_dragging = False
-                self._lock_id = -1
-
-            if self._is_dragging and point.id == self._lock_id:
-                point.pos.x = world_mouse_pos.x
-                point.pos.y = world_mouse_pos.y
+        if self._picker.update(world_mouse_pos) is not None:
+            self._curve.mark_dirty()
 
         if self._is_reset_points:
             self._p0.pos = Vec2(100, 200)
             self._p1.pos = Vec2(80,  100)
             self._p2.pos = Vec2(320, 100)
             self._p3.pos = Vec2(300, 200)
+            self._curve.set_points(self._p0.pos, self._p1.pos, self._p2.pos, self._p3.pos)
+            self._picker.rebuild()
+
+    def save_scene(self, path):
+        points = [(point.pos.x, point.pos.y) for point in (self._p0, self._p1, self._p2, self._p3)]
+        return save_scene(Scene.from_curves([points]), path)
+
+    def load_scene(self, path):
+        # Takes the first cubic in the scene, other curves are ignored since the editor shows one curve
+        for points in load_scene(path):
+            if len(points) == 4:
+                (x0, y0), (x1, y1), (x2, y2), (x3, y3) = points.tolist()
+                self._p0.pos = Vec2(x0, y0)
+                self._p1.pos = Vec2(x1, y1)
+                self._p2.pos = Vec2(x2, y2)
+                self._p3.pos = Vec2(x3, y3)
+                self._curve.set_points(self._p0.pos, self._p1.pos, self._p2.pos, self._p3.pos)
+                self._picker.rebuild()
+                return True
+
+        return False
+
+    def is_animating(self):
+        is_ball_moving = not self._is_ball_pause and not self._is_ball_manual_mode
+        return is_ball_moving or self._is_blinking_mode or self._picker.is_dragging
 
     def draw_object(self):
         #----------------------------------------------------------------
@@ -829,19 +987,21 @@ class BezierObject(object):
             self._t)
         
         #----------------------------------------------------------------
-        # Draw the bezier line
-        self._draw_bezier(self._p0, self._p1, self._p2, self._p3)
+        # Draw the bezier line, skipped when the curve bounds are off-screen
+        if self._is_curve_visible():
+            self._draw_bezier(self._curve, self._flatten_tolerance / self._zoom)
 
         #----------------------------------------------------------------
         # Draw the ball
         self._ball.draw()
 
         # Update abcd points position
-        a = self._p0.pos.lerp(self._p1.pos, self._t)
-        b = self._p1.pos.lerp(self._p2.pos, self._t)
-        c = self._p2.pos.lerp(self._p3.pos, self._t)
-        d = a.lerp(b, self._t)
-        e = b.lerp(c, self._t)
+        a, b, c, d, e = self._abcde
+        self._p0.pos.lerp_into(self._p1.pos, self._t, a)
+        self._p1.pos.lerp_into(self._p2.pos, self._t, b)
+        self._p2.pos.lerp_into(self._p3.pos, self._t, c)
+        a.lerp_into(b, self._t, d)
+        b.lerp_into(c, self._t, e)
 
         #----------------------------------------------------------------
         # Draw the abcde points
@@ -852,16 +1012,17 @@ class BezierObject(object):
             draw_circle(d.x, d.y, 7, self._abcde_color)
             draw_circle(e.x, e.y, 7, self._abcde_color)
 
-            draw_text("A", a.x, a.y, 14, BLACK)
-            draw_text("B", b.x, b.y, 14, BLACK)
-            draw_text("C", c.x, c.y, 14, BLACK)
-            draw_text("D", d.x, d.y, 14, BLACK)
-            draw_text("E", e.x, e.y, 14, BLACK)
+            g_label_cache.draw("A", a.x, a.y, 14, BLACK)
+            g_label_cache.draw("B", b.x, b.y, 14, BLACK)
+            g_label_cache.draw("C", c.x, c.y, 14, BLACK)
+            g_label_cache.draw("D", d.x, d.y, 14, BLACK)
+            g_label_cache.draw("E", e.x, e.y, 14, BLACK)
             
             if self._is_draw_abcde_line: 
-                draw_line_v(a.rl_vec(), b.rl_vec(), self._abcde_lines_color)
-                draw_line_v(b.rl_vec(), c.rl_vec(), self._abcde_lines_color)
-                draw_line_v(d.rl_vec(), e.rl_vec(), self._abcde_lines_color)
+                rl_a, rl_b, rl_c, rl_d, rl_e = [v.rl_vec(out) for v, out in zip(self._abcde, self._rl_abcde)]
+                draw_line_v(rl_a, rl_b, self._abcde_lines_color)
+                draw_line_v(rl_b, rl_c, self._abcde_lines_color)
+                draw_line_v(rl_d, rl_e, self._abcde_lines_color)
 
     def draw_gui(self):
         #----------------------------------------------------------------
@@ -877,6 +1038,7 @@ class BezierObject(object):
         self._is_draw_abcde_line = draw_checkbox("Draw abcde line",   Rectangle(10, 90 + 40 * 2, 32, 32), self._is_draw_abcde_line)
         self._is_ball_pause = draw_checkbox("Pause",                  Rectangle(10, 90 + 40 * 3, 32, 32), self._is_ball_pause)
         self._is_blinking_mode = draw_checkbox("Blinking Mode",       Rectangle(10, 90 + 40 * 4, 32, 32), self._is_blinking_mode)
+        self._is_constant_speed = draw_checkbox("Constant Speed",     Rectangle(10, 90 + 40 * 5, 32, 32), self._is_constant_speed)
 
         #----------------------------------------------------------------
         # Draw the slider
@@ -893,6 +1055,147 @@ class BezierObject(object):
 
 
 
+# ----------------------------------------------------------------
+# Instancing
+
+INSTANCING_VS = """#version 330
+in vec3 vertexPosition;
+in vec3 vertexNormal;
+in mat4 instanceTransform;
+
+uniform mat4 mvp;
+
+out vec3 fragNormal;
+
+void main()
+{
+    fragNormal = mat3(instanceTransform) * vertexNormal;
+    gl_Position = mvp * instanceTransform * vec4(vertexPosition, 1.0);
+}
+"""
+
+INSTANCING_FS = """#version 330
+in vec3 fragNormal;
+
+uniform vec4 colDiffuse;
+
+out vec4 finalColor;
+
+void main()
+{
+    float light = 0.35 + 0.65 * max(dot(normalize(fragNormal), normalize(vec3(0.4, 1.0, 0.3))), 0.0);
+    finalColor = vec4(colDiffuse.rgb * light, colDiffuse.a);
+}
+"""
+
+def rl_matrix_buffer(matrices):
+    # Packs (N, 4, 4) matrices into a contiguous Matrix[N], raylib's Matrix fields are laid out row by row
+    matrices = np.ascontiguousarray(matrices, dtype=np.float32)
+    buffer = (Matrix * len(matrices))()
+    ctypes.memmove(buffer, matrices.ctypes.data, matrices.nbytes)
+
+    return buffer
+
+def translation_matrix(x, y, z) -> np.ndarray:
+    matrix = np.eye(4)
+    matrix[:3, 3] = (x, y, z)
+    return matrix
+
+class InstancedPrimitives(object):
+    def __init__(self, parent, capsule, cube, sphere, grid_count=32, spacing=12.0):
+        self.parent = parent
+        self.count  = grid_count * grid_count
+
+        self._capsule = capsule
+        self._cube    = cube
+        self._sphere  = sphere
+
+        # One child node of "parent" per instance on a grid in the XZ plane, added in one block
+        half = (grid_count - 1) * spacing / 2
+        self._first_node = len(parent.graph)
+        for i in range(self.count):
+            parent.graph.add(parent.node, ((i % grid_count) * spacing - half, 0.0, (i // grid_count) * spacing - half))
+
+        # Object name -> (model name, offset applied before the instance transform) per mesh,
+        # the capsule is a cylinder standing on start_pos with a sphere at each end, like the upright default
+        start, end = capsule.start_pos, capsule.end_pos
+        self._parts = {
+            "Capsule": [("cylinder", translation_matrix(start.x, start.y, start.z)),
+                        ("cap",      translation_matrix(start.x, start.y, start.z)),
+                        ("cap",      translation_matrix(end.x, end.y, end.z))],
+            "Cube":    [("cube",     translation_matrix(cube.pos.x, cube.pos.y, cube.pos.z))],
+            "Sphere":  [("sphere",   translation_matrix(sphere.pos.x, sphere.pos.y, sphere.pos.z))],
+        }
+
+        # GPU resources need a window, they are created on the first draw
+        self._shader = None
+        self._default_shader = None
+        self._models = {}
+
+        # (object name, part index) -> (parent world version, Matrix[count])
+        self._buffers = {}
+
+    def _load(self):
+        self._shader = load_shader_from_memory(INSTANCING_VS, INSTANCING_FS)
+        self._shader.locs[SHADER_LOC_MATRIX_MVP] = get_shader_location(self._shader, "mvp")
+        self._shader.locs[SHADER_LOC_MATRIX_MODEL] = get_shader_location_attrib(self._shader, "instanceTransform")
+
+        capsule, cube, sphere = self._capsule, self._cube, self._sphere
+        height = vector3_distance(capsule.start_pos, capsule.end_pos)
+        meshes = {
+            "cylinder": gen_mesh_cylinder(capsule.radius, height, capsule.slices),
+            "cap":      gen_mesh_sphere(capsule.radius, capsule.rings, capsule.slices),
+            "cube":     gen_mesh_cube(cube.width, cube.height, cube.length),
+            "sphere":   gen_mesh_sphere(sphere.radius, 16, 16),
+        }
+
+        for name, mesh in meshes.items():
+            model = load_model_from_mesh(mesh)
+            self._default_shader = model.materials[0].shader
+            model.materials[0].shader = self._shader
+            self._models[name] = model
+
+    def _buffer(self, object_name, part, offset):
+        # Instance children only change through the parent, so its world version keys the cache
+        version = self.parent.graph.world_version(self.parent.node)
+        key = (object_name, part)
+        cached = self._buffers.get(key)
+        if cached is None or cached[0] != version:
+            worlds = self.parent.graph.world_matrices()[self._first_node:self._first_node + self.count]
+            cached = (version, rl_matrix_buffer(worlds @ offset))
+            self._buffers[key] = cached
+
+        return cached[1]
+
+    def has(self, object_name) -> bool:
+        return object_name in self._parts
+
+    def draw(self, object_name, color):
+        if self._shader is None:
+            self._load()
+
+        for part, (model_name, offset) in enumerate(self._parts[object_name]):
+            model = self._models[model_name]
+            material = model.materials[0]
+            material.maps[MATERIAL_MAP_DIFFUSE].color = color
+            draw_mesh_instanced(model.meshes[0], material, self._buffer(object_name, part, offset), self.count)
+
+    def unload(self):
+        if self._shader is None:
+            return
+
+        # The models share one shader, give each its default back so unload_model does not free it again
+        for model in self._models.values():
+            model.materials[0].shader = self._default_shader
+            unload_model(model)
+        unload_shader(self._shader)
+
+        self._models.clear()
+        self._buffers.clear()
+        self._shader = None
+
+
+
 # ----------------------------------------------------------------
 # Object3D
 
@@ -944,10 +1247,74 @@ class Sphere(object):
         draw_sphere(self.pos, self.radius, self.color)
 
 
+def rl_alloc_copy(array, ctype):
+    # Copies into memory from raylib's allocator, so unload_mesh can free it
+    pointer = ctypes.cast(mem_alloc(array.nbytes), ctypes.POINTER(ctype))
+    ctypes.memmove(pointer, array.ctypes.data, array.nbytes)
+
+    return pointer
+
+def rl_upload_mesh(mesh, dynamic=False):
+    try:
+        upload_mesh(mesh, dynamic)
+    except NameError:
+        # raylib-py 5.5's upload_mesh wrapper calls an undefined helper, go to the C function instead
+        import raylibpy
+        raylibpy.rlapi.UploadMesh(ctypes.byref(mesh), ctypes.c_bool(dynamic))
+
+class BezierTube(object):
+    def __init__(self, radius=0.15, samples=96, sides=16, color=YELLOW):
+        self.curve = CubicBezier3D(Vec3(-3, 0.5, 0), Vec3(-1, 4, 3), Vec3(1, -1, -3), Vec3(3, 3, 0))
+        self.radius  = radius
+        self.samples = samples
+        self.sides   = sides
+        self.color   = color
+
+        # The TubeMesh the model was built from, the curve hands back a new one only after its points move
+        self._tube  = None
+        self._model = None
+
+    def update(self, color):
+        self.color = color
+
+    def _upload(self, tube):
+        self.unload()
+
+        # Zero-filled rather than Mesh(), whose None defaults ctypes rejects for the integer fields
+        mesh = Mesh.from_buffer_copy(bytes(ctypes.sizeof(Mesh)))
+        mesh.vertex_count   = tube.vertex_count
+        mesh.triangle_count = tube.triangle_count
+        mesh.vertices       = rl_alloc_copy(tube.vertices, ctypes.c_float)
+        mesh.normals        = rl_alloc_copy(tube.normals, ctypes.c_float)
+        mesh.texcoords      = rl_alloc_copy(tube.texcoords, ctypes.c_float)
+        mesh.indices        = rl_alloc_copy(tube.indices, ctypes.c_ushort)
+        rl_upload_mesh(mesh)
+
+        self._model = load_model_from_mesh(mesh)
+        self._tube = tube
+
+    def draw(self):
+        tube = self.curve.tube(self.radius, self.samples, self.sides)
+        if tube is not self._tube:
+            self._upload(tube)
+
+        draw_model(self._model, Vector3(0, 0, 0), 1.0, self.color)
+
+        # Control polygon
+        for a, b in zip(self.curve.points, self.curve.points[1:]):
+            draw_line3d(a.rl_vec(), b.rl_vec(), DARKGRAY)
+
+    def unload(self):
+        if self._model is not None:
+            unload_model(self._model)
+            self._model = None
+            self._tube = None
+
+
 class Object3D(object):
     def __init__(self):
         self.current_object = "Capsule"
-        self.objects = ["Capsule", "Cube", "Sphere"]
+        self.objects = ["Capsule", "Cube", "Sphere", "Bezier Tube"]
         
         self.colors = ["RED", "BLACK", "GREEN", "YELLOW", "BLUE", "GRAY", "PURPLE"]
         self.str_current_color = "PURPLE"
@@ -956,21 +1323,43 @@ class Object3D(object):
         self.capsule = Capsule()
         self.cube = Cube()
         self.sphere = Sphere()
+        self.bezier_tube = BezierTube()
 
-        self.object_3d_objects_dropdown = Dropdown("Object", self.objects, 3, Rectangle(120, 30, 100, 35))
+        self.object_3d_objects_dropdown = Dropdown("Object", self.objects, 4, Rectangle(120, 30, 100, 35))
         self.object_3d_colors_dropdown = Dropdown("Color", self.colors, 7, Rectangle(230, 30, 100, 35))
 
         self.transform = Transform3D()
 
+        # Draws a grid of every primitive with one draw_mesh_instanced call per mesh
+        self.is_instanced = False
+        self.instanced = InstancedPrimitives(self.transform, self.capsule, self.cube, self.sphere)
+
+        # Polled with is_key_down in update
+        self.move_keys = (KEY_A, KEY_D, KEY_W, KEY_S, KEY_UP, KEY_DOWN)
+
+    def is_animating(self):
+        # get_key_pressed only reports the first frame of a held key, the object keeps moving after that
+        return any(is_key_down(key) for key in self.move_keys)
+
+    def unload(self):
+        self.instanced.unload()
+        self.bezier_tube.unload()
+
     def update(self):
         if not is_mouse_button_down(MOUSE_BUTTON_LEFT):
-            if is_key_down(KEY_A): self.transform.pos.x -= 0.05
-            if is_key_down(KEY_D): self.transform.pos.x += 0.05
-            if is_key_down(KEY_W): self.transform.pos.z += 0.05
-            if is_key_down(KEY_S): self.transform.pos.z -= 0.05
+            pos = self.transform.pos
+            old_pos = (pos.x, pos.y, pos.z)
+
+            if is_key_down(KEY_A): pos.x -= 0.05
+            if is_key_down(KEY_D): pos.x += 0.05
+            if is_key_down(KEY_W): pos.z -= 0.05
+            if is_key_down(KEY_S): pos.z += 0.05
 
-            if is_key_down(KEY_UP): self.transform.pos.y -= 0.05
-            if is_key_down(KEY_DOWN): self.transform.pos.y += 0.05
+            if is_key_down(KEY_UP): pos.y += 0.05
+            if is_key_down(KEY_DOWN): pos.y -= 0.05
+
+            if (pos.x, pos.y, pos.z) != old_pos:
+                self.transform.mark_dirty()
 
         # Current color
 
@@ -1006,9 +1395,16 @@ class Object3D(object):
         elif self.current_object == "Sphere":
             self.sphere.update(self.current_color)
 
+        elif self.current_object == "Bezier Tube":
+            self.bezier_tube.update(self.current_color)
+
     def draw(self):
+        if self.is_instanced and self.instanced.has(self.current_object):
+            self.instanced.draw(self.current_object, self.current_color)
+            return
+
         rl_push_matrix()
-        rl_mult_matrixf(matrix_to_float_v(self.transform.to_matrix()).v)
+        rl_mult_matrixf(self.transform.to_float_v())
         if self.current_object == "Capsule":
             self.capsule.draw()
 
@@ -1017,9 +1413,14 @@ class Object3D(object):
 
         elif self.current_object == "Sphere":
             self.sphere.draw()
+
+        elif self.current_object == "Bezier Tube":
+            self.bezier_tube.draw()
         rl_pop_matrix()
 
     def draw_gui(self):
+        self.is_instanced = draw_checkbox("Instanced", Rectangle(10, 90, 32, 32), self.is_instanced)
+
         self.current_object = self.objects[self.object_3d_objects_dropdown.draw()]
         self.str_current_color = self.colors[self.object_3d_colors_dropdown.draw()]
 
@@ -1090,6 +1491,9 @@ class Object2D(object):
         self.pos_slider_pos_x = ProSlider(Rectangle(slider_pos_x, 140, 100, 10), "PosX:", "", [50.0], -200.0, 500.0, 10)
         self.pos_slider_pos_y = ProSlider(Rectangle(slider_pos_x, 160, 100, 10), "PosY:", "", [50.0], -200.0, 500.0, 10)
 
+    def is_animating(self):
+        return False
+
     def update(self):
 
         # Current color
@@ -1157,11 +1561,9 @@ class Object2D(object):
 # App
 
 class App():
-    def __init__(self):
+    def __init__(self, is_idle_mode=False):
         self.screen_width    = 1080
         self.screen_height   = 720
-        self.world_width     = 2200
-        self.world_height    = 2200
         self.grid_size       = 80
 
         set_config_flags(FLAG_MSAA_4X_HINT)
@@ -1173,6 +1575,7 @@ class App():
     
         # Grid
         self.is_draw_grid = False
+        self.grid = GridRenderer(self.grid_size)
 
         # Menu bar
         self.menu_bar = MenuBar()
@@ -1195,23 +1598,57 @@ class App():
 
         self.is_3d_mode = False
 
+        # Idle mode: when nothing animates and no input arrives, end_drawing() blocks until the
+        # next input event instead of redrawing at the target FPS
+        self.is_idle_mode = is_idle_mode
+        self._is_waiting_events = False
+        self._active_frames = 0
+
+        # Profiler, F3 toggles the overlay and F4 dumps the history to CSV
+        self.profiler = FrameProfiler()
+        self.is_draw_profiler = False
+
+    def _is_active(self):
+        mode = self.menu_bar.get_current_mode()
+        objects = [self.simple_line, self.bezier_object, self.object_2d, self.object_3d]
+        if objects[mode].is_animating():
+            return True
+
+        mouse_delta = get_mouse_delta()
+        return (get_key_pressed() != 0 or get_char_pressed() != 0 or
+                mouse_delta.x != 0 or mouse_delta.y != 0 or get_mouse_wheel_move() != 0 or
+                is_mouse_button_down(MOUSE_BUTTON_LEFT) or is_mouse_button_down(MOUSE_BUTTON_RIGHT) or
+                is_window_resized())
+
+    def _update_idle(self):
+        # A few extra frames after the last activity let menus, hover states and cached labels settle
+        self._active_frames = 3 if self._is_active() else max(self._active_frames - 1, 0)
+
+        is_waiting = self._active_frames == 0
+        if is_waiting != self._is_waiting_events:
+            if is_waiting:
+                enable_event_waiting()
+            else:
+                disable_event_waiting()
+            self._is_waiting_events = is_waiting
+
     def _draw_grid(self):
         if self.is_draw_grid and not self.is_3d_mode:
-            for x in range(-self.world_width // 2, (self.world_width // 2) + 1, self.grid_size):
-                draw_line(x, -self.world_height // 2, x, self.world_height // 2, DARKGRAY)
-
-            for y in range(-self.world_height // 2, (self.world_height // 2) + 1, self.grid_size):
-                draw_line(-self.world_width // 2, y, self.world_width // 2, y, DARKGRAY)
+            self.grid.draw(self.camera_2d)
 
     def _draw_gui0(self):
         #----------------------------------------------------------------
         # Draw grid
+        self.profiler.begin("grid")
         self._draw_grid()
+        self.profiler.end("grid")
     
     def _draw_gui1(self):
+        self.profiler.begin("gui")
+
         #----------------------------------------------------------------
         # Grid checkbox
-        grid_checkbox_pos_y = int(90 + 40 * 5) if self.menu_bar.get_current_mode() == 1 else int(90 + 40 * 0)
+        grid_checkbox_pos_y = int(90 + 40 * 6) if self.menu_bar.get_current_mode() == 1 else int(90 + 40 * 0)
         if not self.menu_bar.get_current_mode() == 3:
             self.is_draw_grid = draw_checkbox("Draw Grid", Rectangle(10, grid_checkbox_pos_y, 32, 32), self.is_draw_grid)
         
@@ -1228,25 +1665,70 @@ class App():
         
         elif self.menu_bar.get_current_mode() == 3:
             self.object_3d.draw_gui()
+
+        self.profiler.end("gui")
         
         #----------------------------------------------------------------
         # Draw the menu bar
+        self.profiler.begin("menu_bar")
         self.menu_bar.draw()
+        self.profiler.end("menu_bar")
 
         #----------------------------------------------------------------
         # Draw FPS
         draw_fps(self.screen_width - 80, 10)
 
+        #----------------------------------------------------------------
+        # Draw the profiler overlay
+        if self.is_draw_profiler:
+            self._draw_profiler()
+
+    def _draw_profiler(self):
+        phases = self.profiler.phases()
+        x, y = self.screen_width - 330, 40
+
+        draw_rectangle(x - 10, y - 10, 320, 30 + 16 * len(phases), fade(BLACK, 0.7))
+        draw_text("phase            p50     p95     p99 (ms)", x, y, 10, RAYWHITE)
+
+        for i, phase in enumerate(phases):
+            p50, p95, p99 = self.profiler.percentiles(phase) * 1000.0
+            draw_text("{:<14} {:>7.2f} {:>7.2f} {:>7.2f}".format(phase, p50, p95, p99), x, y + 16 * (i + 1), 10, RAYWHITE)
+
     def run(self):
         def update():
+            if is_key_pressed(KEY_F3):
+                self.is_draw_profiler = not self.is_draw_profiler
+
+            if is_key_pressed(KEY_F4):
+                self.profiler.dump_csv(datetime.now().strftime("profile_%Y%m%d_%H%M%S.csv"))
+
+            # The menu bar is drawn after the update, so these are the clicks from the last frame
+            # A scene that cannot be written or read is reported and the editor keeps its curve
+            try:
+                if self.menu_bar.is_save_scene():
+                    self.bezier_object.save_scene(SCENE_PATH)
+
+                if self.menu_bar.is_load_scene() and os.path.exists(SCENE_PATH):
+                    self.bezier_object.load_scene(SCENE_PATH)
+            except (OSError, ValueError) as e:
+                print("Scene " + SCENE_PATH + ": " + str(e), file=sys.stderr)
+
             if self.menu_bar.get_current_mode() == 3:
+                self.profiler.begin("camera")
                 self.camera_3d.update()
+                self.profiler.end("camera")
+
+                self.profiler.begin("object_update")
                 self.object_3d.update()
+                self.profiler.end("object_update")
 
                 self.is_3d_mode = True
             else:
+                self.profiler.begin("camera")
                 self.camera_2d.update(self.center_point.rl_vec())
+                self.profiler.end("camera")
 
+                self.profiler.begin("object_update")
                 if self.menu_bar.get_current_mode() == 0:
                     self.simple_line.update(self.camera_2d)
                     
@@ -1255,15 +1737,22 @@ class App():
                 
                 elif self.menu_bar.get_current_mode() == 2:
                     self.object_2d.update()
+                self.profiler.end("object_update")
 
                 self.is_3d_mode = False
 
         def render():
+            # Label textures have to be rendered before any camera mode begins
+            self.profiler.begin("labels")
+            g_label_cache.flush()
+            self.profiler.end("labels")
+
             begin_drawing()
             clear_background(RAYWHITE)
 
             self._draw_gui0()
 
+            self.profiler.begin("object_draw")
             if self.menu_bar.get_current_mode() == 3:
                 self.camera_3d.begin_mode()
                 self.object_3d.draw()
@@ -1284,17 +1773,30 @@ class App():
                     self.object_2d.draw()
                 
                 self.camera_2d.end_mode()
+            self.profiler.end("object_draw")
         
             self._draw_gui1()
 
+            # Includes the GPU flush and the wait for the target FPS
+            self.profiler.begin("present")
             end_drawing()
+            self.profiler.end("present")
 
         while not window_should_close() and not g_app_should_close:
+            self.profiler.begin_frame()
             update()
             render()
+            self.profiler.end_frame()
+
+            if self.is_idle_mode:
+                self._update_idle()
 
+        g_screenshot_writer.stop()
+        g_label_cache.unload()
+        self.grid.unload()
+        self.object_3d.unload()
         close_window()
 
 if __name__ == '__main__':
-    app = App()
+    app = App(is_idle_mode="--idle" in sys.argv[1:])
     app.run()
@@ -0,0 +1,96 @@
+#   Copyright (c) 2024 Wildan R Wijanarko (@wildan9)
+#
+#   Permission is hereby granted, free of charge, to any person obtaining a copy
+#   of this software and associated documentation files (the "Software"), to deal
+#   in the Software without restriction, including without limitation the rights
+#   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#   copies of the Software, and to permit persons to whom the Software is
+#   furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in all
+#   copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#   SOFTWARE.
+
+# Per-frame phase timings, kept headless so it can be used without a window.
+
+import csv
+import time
+
+import numpy as np
+
+# ----------------------------------------------------------------
+# FrameProfiler
+
+class FrameProfiler(object):
+    def __init__(self, capacity=600):
+        self.capacity = capacity
+
+        # phase name -> ring buffer of durations in seconds, one slot per frame
+        self._samples = {}
+        self._index = 0
+        self._count = 0
+
+        self._current = {}
+        self._starts = {}
+        self._frame_start = 0.0
+
+    def phases(self):
+        return list(self._samples.keys())
+
+    def begin_frame(self):
+        self._current.clear()
+        self._frame_start = time.perf_counter()
+
+    def begin(self, phase):
+        self._starts[phase] = time.perf_counter()
+
+    def end(self, phase):
+        elapsed = time.perf_counter() - self._starts[phase]
+        self._current[phase] = self._current.get(phase, 0.0) + elapsed
+
+    def end_frame(self):
+        self._current["frame"] = time.perf_counter() - self._frame_start
+
+        for phase, elapsed in self._current.items():
+            if phase not in self._samples:
+                self._samples[phase] = np.zeros(self.capacity)
+            self._samples[phase][self._index] = elapsed
+
+        # Phases skipped this frame (e.g. another mode) record zero
+        for phase, samples in self._samples.items():
+            if phase not in self._current:
+                samples[self._index] = 0.0
+
+        self._index = (self._index + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def history(self, phase) -> np.ndarray:
+        # Oldest to newest durations in seconds
+        samples = self._samples[phase]
+        if self._count < self.capacity:
+            return samples[:self._count]
+        return np.roll(samples, -self._index)
+
+    def percentiles(self, phase, q=(50, 95, 99)) -> np.ndarray:
+        if self._count == 0 or phase not in self._samples:
+            return np.zeros(len(q))
+        return np.percentile(self._samples[phase][:self._count], q)
+
+    def dump_csv(self, path):
+        phases = self.phases()
+        columns = np.stack([self.history(phase) for phase in phases], axis=1) * 1000.0
+
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + [phase + "_ms" for phase in phases])
+            for i, row in enumerate(columns.tolist()):
+                writer.writerow([i] + ["{:.4f}".format(value) for value in row])
+
+        return path
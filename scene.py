@@ -0,0 +1,204 @@
+#   Copyright (c) 2024 Wildan R Wijanarko (@wildan9)
+#
+#   Permission is hereby granted, free of charge, to any person obtaining a copy
+#   of this software and associated documentation files (the "Software"), to deal
+#   in the Software without restriction, including without limitation the rights
+#   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#   copies of the Software, and to permit persons to whom the Software is
+#   furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in all
+#   copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#   SOFTWARE.
+
+
+# Scene files: a compact binary format that can be memory mapped, plus JSON for interchange.
+#
+#   header   32 bytes, see HEADER
+#   curves   curve_count CURVE_DTYPE records
+#   points   point_count (x, y) pairs of float32 or float64, every curve's control points back to back
+#
+# Everything is little endian and 8 byte aligned, so load_binary can hand out numpy views straight
+# into the mapped file.
+#
+#   python scene.py scene.json scene.bzs
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b"BZSC"
+VERSION = 1
+BINARY_EXTENSION = ".bzs"
+
+# magic, version, point dtype code, dimensions, curve count, point count, padding
+HEADER = struct.Struct("<4sHBBQQ8x")
+
+POINT_DTYPES = {0: np.dtype("<f4"), 1: np.dtype("<f8")}
+POINT_DTYPE_CODES = {dtype: code for code, dtype in POINT_DTYPES.items()}
+
+# offset and count index into the point array, color is packed RGBA with 0 meaning unset
+CURVE_DTYPE = np.dtype([("offset", "<u8"), ("count", "<u4"), ("color", "<u4")])
+
+# ----------------------------------------------------------------
+# Scene
+
+class Scene(object):
+    def __init__(self, points, curves):
+        # points is (N, 2), curves holds CURVE_DTYPE records, either may be a read-only view into a mapped file
+        self.points = points
+        self.curves = curves
+
+    @classmethod
+    def from_curves(cls, curves, colors=None, dtype=np.float64):
+        curves = [np.asarray(points, dtype=dtype).reshape(-1, 2) for points in curves]
+
+        records = np.zeros(len(curves), CURVE_DTYPE)
+        records["count"] = [len(points) for points in curves]
+        records["offset"][1:] = np.cumsum(records["count"][:-1], dtype=np.uint64)
+        if colors is not None:
+            records["color"] = colors
+
+        points = np.concatenate(curves) if curves else np.empty((0, 2), dtype)
+        return cls(points, records)
+
+    def __len__(self):
+        return len(self.curves)
+
+    def __iter__(self):
+        for offset, count in zip(self.curves["offset"].tolist(), self.curves["count"].tolist()):
+            yield self.points[offset:offset + count]
+
+    def curve(self, i) -> np.ndarray:
+        offset, count = int(self.curves["offset"][i]), int(self.curves["count"][i])
+        return self.points[offset:offset + count]
+
+    def degrees(self) -> np.ndarray:
+        return self.curves["count"].astype(np.int64) - 1
+
+# ----------------------------------------------------------------
+# Binary
+
+def save_binary(scene, path, dtype=np.float32):
+    point_dtype = np.dtype(dtype).newbyteorder("<")
+    if point_dtype not in POINT_DTYPE_CODES:
+        raise ValueError("unsupported point dtype " + str(dtype))
+
+    points = np.ascontiguousarray(scene.points, dtype=point_dtype)
+    curves = np.ascontiguousarray(scene.curves, dtype=CURVE_DTYPE)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, POINT_DTYPE_CODES[point_dtype], 2, len(curves), len(points)))
+        curves.tofile(f)
+        points.tofile(f)
+
+    return path
+
+def load_binary(path) -> Scene:
+    # The returned arrays are read-only views into the mapped file, nothing is copied up front
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(buffer) < HEADER.size:
+        raise ValueError(path + ": not a scene file")
+
+    magic, version, dtype_code, dimensions, curve_count, point_count = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(path + ": not a scene file")
+    if version != VERSION:
+        raise ValueError("{}: unsupported scene version {}".format(path, version))
+    if dtype_code not in POINT_DTYPES or dimensions != 2:
+        raise ValueError(path + ": unsupported point layout")
+
+    point_dtype = POINT_DTYPES[dtype_code]
+    points_offset = HEADER.size + curve_count * CURVE_DTYPE.itemsize
+    if len(buffer) < points_offset + point_count * 2 * point_dtype.itemsize:
+        raise ValueError(path + ": truncated scene file")
+
+    curves = np.frombuffer(buffer, CURVE_DTYPE, curve_count, HEADER.size)
+    points = np.frombuffer(buffer, point_dtype, point_count * 2, points_offset).reshape(-1, 2)
+
+    # Checked once here so readers can slice points by the records without bounds checks
+    offsets, counts = curves["offset"], curves["count"].astype(np.uint64)
+    if not ((counts >= 2) & (offsets <= point_count) & (counts <= point_count - np.minimum(offsets, point_count))).all():
+        raise ValueError(path + ": curve records with fewer than 2 points or outside the point array")
+
+    return Scene(points, curves)
+
+# ----------------------------------------------------------------
+# JSON
+
+def load_json(path) -> Scene:
+    # {"curves": [{"points": [[x, y], ...], "color": rgba}, ...]} or a bare list of point lists
+    with open(path) as f:
+        data = json.load(f)
+
+    if isinstance(data, dict):
+        data = data["curves"]
+
+    curves, colors = [], []
+    for curve in data:
+        points = curve["points"] if isinstance(curve, dict) else curve
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(points) < 2:
+            raise ValueError(path + ": a curve needs at least 2 control points")
+
+        curves.append(points)
+        colors.append(curve.get("color", 0) if isinstance(curve, dict) else 0)
+
+    return Scene.from_curves(curves, colors)
+
+def save_json(scene, path):
+    data = []
+    for points, color in zip(scene, scene.curves["color"].tolist()):
+        curve = {"points": points.tolist()}
+        if color:
+            curve["color"] = color
+        data.append(curve)
+
+    with open(path, "w") as f:
+        json.dump({"curves": data}, f)
+
+    return path
+
+# ----------------------------------------------------------------
+# Format detection
+
+def is_binary(path) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def load_scene(path) -> Scene:
+    return load_binary(path) if is_binary(path) else load_json(path)
+
+def save_scene(scene, path, dtype=np.float32):
+    if path.endswith(".json"):
+        return save_json(scene, path)
+    return save_binary(scene, path, dtype)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert scenes between the binary and JSON formats")
+    parser.add_argument("input")
+    parser.add_argument("output", help="written as JSON when it ends in .json, binary otherwise")
+    parser.add_argument("--float64", action="store_true", help="store binary points as float64 instead of float32")
+    args = parser.parse_args()
+
+    scene = load_scene(args.input)
+    save_scene(scene, args.output, np.float64 if args.float64 else np.float32)
+    print("{}: {} curves, {} points".format(args.output, len(scene), len(scene.points)))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#   Copyright (c) 2024 Wildan R Wijanarko (@wildan9)
+#
+#   Permission is hereby granted, free of charge, to any person obtaining a copy
+#   of this software and associated documentation files (the "Software"), to deal
+#   in the Software without restriction, including without limitation the rights
+#   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#   copies of the Software, and to permit persons to whom the Software is
+#   furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in all
+#   copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#   SOFTWARE.
+
+
+# Chunked tessellation of curve sets too large to hold as Python objects. Curves are read a chunk
+# at a time, sampled with the vectorized Bézier math and handed on as float32 vertex buffers, so
+# peak memory depends on the chunk size rather than on the input size.
+#
+#   python stream.py huge.bzs --chunk 65536 --samples 32 --trace-memory
+#
+# Binary scenes are read through the memory map and JSON Lines files (one curve per line, a point
+# list or {"points": ...}) line by line. Plain JSON has to be parsed whole before it can be chunked.
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from geometry import bezier_points, sample_curves
+from scene import Scene, is_binary, load_binary, load_json
+
+CHUNK_CURVES = 65536
+
+# ----------------------------------------------------------------
+# Reading
+
+def _parse_curve(line):
+    curve = json.loads(line)
+    points = curve["points"] if isinstance(curve, dict) else curve
+    color = curve.get("color", 0) if isinstance(curve, dict) else 0
+    return points, color
+
+def iter_jsonl_chunks(path, chunk_curves=CHUNK_CURVES):
+    first = 0
+    curves, colors = [], []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+
+            points, color = _parse_curve(line)
+            curves.append(points)
+            colors.append(color)
+
+            if len(curves) == chunk_curves:
+                yield first, Scene.from_curves(curves, colors)
+                first += len(curves)
+                curves, colors = [], []
+
+    if curves:
+        yield first, Scene.from_curves(curves, colors)
+
+def iter_scene_chunks(path, chunk_curves=CHUNK_CURVES):
+    # Yields (index of the first curve, Scene) pairs, a chunk's offsets index into its own points
+    if path.endswith(".jsonl"):
+        yield from iter_jsonl_chunks(path, chunk_curves)
+        return
+
+    scene = load_binary(path) if is_binary(path) else load_json(path)
+
+    # Binary chunks share the mapped point array, only the pages a chunk touches are read
+    for first in range(0, len(scene), chunk_curves):
+        yield first, Scene(scene.points, scene.curves[first:first + chunk_curves])
+
+# ----------------------------------------------------------------
+# Tessellation
+
+def tessellate_chunk(chunk, samples=32):
+    # Yields (curve indices within the chunk, (K, samples, 2) float32 vertices), one batch per degree
+    counts = chunk.curves["count"]
+    offsets = chunk.curves["offset"].astype(np.int64)
+    ts = np.linspace(0.0, 1.0, samples)
+
+    for count in np.unique(counts).tolist():
+        indices = np.flatnonzero(counts == count)
+        ctrls = chunk.points[offsets[indices, np.newaxis] + np.arange(count)]
+
+        if count == 4:
+            vertices = bezier_points(ctrls, ts)
+        else:
+            vertices = sample_curves(ctrls, samples)
+
+        yield indices, vertices.astype(np.float32)
+
+def stream_vertices(path, chunk_curves=CHUNK_CURVES, samples=32):
+    # Yields (global curve indices, vertices) batches, see tessellate_chunk
+    for first, chunk in iter_scene_chunks(path, chunk_curves):
+        for indices, vertices in tessellate_chunk(chunk, samples):
+            yield first + indices, vertices
+
+# ----------------------------------------------------------------
+# Consumers
+
+class TessellationStats(object):
+    def __init__(self):
+        self.curves   = 0
+        self.batches  = 0
+        self.vertices = 0
+        self.length   = 0.0
+        self.bounds   = None
+
+    def consume(self, curve_indices, vertices):
+        self.curves += len(curve_indices)
+        self.batches += 1
+        self.vertices += vertices.shape[0] * vertices.shape[1]
+
+        segments = np.diff(vertices, axis=1)
+        self.length += float(np.hypot(segments[..., 0], segments[..., 1]).sum(dtype=np.float64))
+
+        bounds = np.concatenate((vertices.min(axis=(0, 1)), vertices.max(axis=(0, 1))))
+        if self.bounds is None:
+            self.bounds = bounds
+        else:
+            self.bounds = np.concatenate((np.minimum(self.bounds[:2], bounds[:2]), np.maximum(self.bounds[2:], bounds[2:])))
+
+def consume(batches, consumer):
+    for curve_indices, vertices in batches:
+        consumer.consume(curve_indices, vertices)
+    return consumer
+
+def main():
+    parser = argparse.ArgumentParser(description="Tessellate a scene chunk by chunk and print statistics")
+    parser.add_argument("input", help="binary scene, JSON Lines or JSON file")
+    parser.add_argument("--chunk", type=int, default=CHUNK_CURVES, help="curves per chunk")
+    parser.add_argument("--samples", type=int, default=32, help="vertices per curve")
+    parser.add_argument("--trace-memory", action="store_true", help="report the peak traced allocation size")
+    args = parser.parse_args()
+
+    if args.trace_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    stats = consume(stream_vertices(args.input, args.chunk, args.samples), TessellationStats())
+    elapsed = time.perf_counter() - start
+
+    print("{} curves, {} vertices in {} batches, {:.3f} s".format(stats.curves, stats.vertices, stats.batches, elapsed))
+    print("total length {:.3f}".format(stats.length))
+    if stats.bounds is not None:
+        print("bounds " + " ".join("{:.3f}".format(v) for v in stats.bounds.tolist()))
+
+    if args.trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        print("peak traced memory {:.1f} MiB".format(peak / 2**20))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
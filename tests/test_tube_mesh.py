@@ -0,0 +1,103 @@
+#   Copyright (c) 2024 Wildan R Wijanarko (@wildan9)
+#
+#   Permission is hereby granted, free of charge, to any person obtaining a copy
+#   of this software and associated documentation files (the "Software"), to deal
+#   in the Software without restriction, including without limitation the rights
+#   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#   copies of the Software, and to permit persons to whom the Software is
+#   furnished to do so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in all
+#   copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#   SOFTWARE.
+
+# Headless checks of the tube mesh built for CubicBezier3D, no window or GL context needed
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry import MESH_MAX_VERTICES, CubicBezier3D, Vec3
+
+
+def make_curve():
+    return CubicBezier3D(Vec3(-3, 0.5, 0), Vec3(-1, 4, 3), Vec3(1, -1, -3), Vec3(3, 3, 0))
+
+
+def test_counts():
+    samples, sides = 32, 8
+    tube = make_curve().tube(0.2, samples, sides)
+
+    assert tube.vertex_count == samples * (sides + 1)
+    assert tube.triangle_count == (samples - 1) * sides * 2
+    assert tube.vertices.shape == (tube.vertex_count, 3)
+    assert tube.normals.shape == (tube.vertex_count, 3)
+    assert tube.texcoords.shape == (tube.vertex_count, 2)
+    assert tube.indices.dtype == np.uint16
+    assert tube.indices.max() < tube.vertex_count
+
+
+def test_outward_ccw_winding():
+    tube = make_curve().tube(0.2, 32, 8)
+    triangles = tube.indices.reshape(-1, 3).astype(np.int64)
+    v0, v1, v2 = (tube.vertices[triangles[:, i]].astype(np.float64) for i in range(3))
+
+    # Counter-clockwise seen from outside puts the face normal along the outward vertex normals
+    face_normals = np.cross(v1 - v0, v2 - v0)
+    vertex_normals = tube.normals[triangles].astype(np.float64).sum(axis=1)
+
+    assert (np.einsum("ij,ij->i", face_normals, vertex_normals) > 0.0).all()
+
+
+def test_cached_until_points_move():
+    curve = make_curve()
+    tube = curve.tube(0.2, 32, 8)
+
+    assert curve.tube(0.2, 32, 8) is tube
+
+    curve.mark_dirty()
+    moved = curve.tube(0.2, 32, 8)
+    assert moved is not tube
+    assert curve.tube(0.2, 32, 8) is moved
+
+    p0, p1, p2, p3 = curve.points
+    curve.set_points(p0, Vec3(-1, 5, 3), p2, p3)
+    assert curve.tube(0.2, 32, 8) is not moved
+
+
+@pytest.mark.parametrize("points", [
+    (Vec3(0, 0, 0), Vec3(1, 1, 0), Vec3(3, 0, 0), Vec3(3, 0, 0)),
+    (Vec3(0, 0, 0), Vec3(0, 0, 0), Vec3(2, 1, 0), Vec3(3, 0, 0)),
+])
+def test_coincident_control_points(points):
+    samples, sides = 16, 8
+    curve = CubicBezier3D(*points)
+    _, tangents, _, _ = curve.frames(samples)
+
+    # The zero derivative at the doubled end must not fall back to an unrelated axis
+    assert np.dot(tangents[0], tangents[1]) > 0.9
+    assert np.dot(tangents[-1], tangents[-2]) > 0.9
+
+    # Both end rings stay across the curve, a ring lying flat in its plane would give about 1 here
+    normals = curve.tube(0.2, samples, sides).normals.reshape(samples, sides + 1, 3)
+    assert np.abs(normals[0] @ tangents[1]).max() < 0.5
+    assert np.abs(normals[-1] @ tangents[-2]).max() < 0.5
+
+
+def test_vertex_limit():
+    sides = 15
+    samples = MESH_MAX_VERTICES // (sides + 1) + 1
+
+    with pytest.raises(ValueError):
+        make_curve().tube(0.2, samples, sides)